@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.urls import include, path
+from recipes.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/', include([
         path('', include('users.urls', namespace='users')),
         path('', include('recipes.urls', namespace='recipes'))
@@ -30,6 +30,7 @@ class RecipeIngredientInline(admin.TabularInline):
 class RecipeAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'name', 'author', 'text', 'cooking_time', 'pub_date', 'image',
+        'favorite_count',
     )
     list_filter = ('name', 'author', 'tags')
     ordering = ('-pub_date',)
@@ -38,9 +39,12 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display_links = ('name',)
     search_fields = ('name',)
 
-    @admin.display(description='Кол-во добавлений в избранное')
+    @admin.display(
+        description='Кол-во добавлений в избранное',
+        ordering='favorites_count'
+    )
     def favorite_count(self, recipe):
-        return recipe.favorites_recipe.count()
+        return recipe.favorites_count
 
 
 @admin.register(IngredientRecipe)
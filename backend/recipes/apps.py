@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
     verbose_name = 'Рецепты'
+
+    def ready(self):
+        import recipes.db  # noqa: F401
+        import recipes.metrics  # noqa: F401
+        import recipes.signals  # noqa: F401
+        from recipes.checks import check_shared_cache
+        from recipes.search import create_search_index
+        check_shared_cache()
+        post_migrate.connect(create_search_index, sender=self)
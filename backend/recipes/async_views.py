@@ -0,0 +1,270 @@
+import asyncio
+import calendar
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from recipes.conditional import (
+    get_recipe_state, recipe_etag, recipe_last_modified, table_conditions
+)
+from recipes.db import replica_reads
+from recipes.paginations import SwitchablePagination
+from recipes.relations import get_relations
+from recipes.response_cache import cache_response, get_cached_response
+from recipes.views import (
+    RECIPE_LIST_CACHE_VERSIONS, IngredientViewSet, RecipeViewSet, TagViewSet
+)
+
+
+def in_thread(func):
+    """Выполняет синхронную функцию в отдельном потоке.
+
+    У каждого потока своё соединение с БД, поэтому несколько таких
+    вызовов, собранных в asyncio.gather, выполняют запросы параллельно.
+    """
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+class AsyncReadView:
+    """Асинхронный GET поверх вьюсета DRF.
+
+    Аутентификация, права, фильтры, пагинация и сериализаторы берутся
+    из view_class, а независимые запросы страницы выполняются
+    одновременно. Остальные методы обрабатывает синхронный вьюсет.
+    Подклассы задают view_class и async-метод get(view, request).
+    """
+    view_class = None
+    actions = None
+
+    @classmethod
+    def as_view(cls):
+        if cls.actions:
+            sync_view = cls.view_class.as_view(cls.actions)
+        else:
+            sync_view = cls.view_class.as_view()
+
+        async def view(request, **kwargs):
+            if request.method != 'GET':
+                return await sync_to_async(sync_view)(request, **kwargs)
+            return await cls().dispatch(request, **kwargs)
+
+        view.cls = cls.view_class
+        view.actions = cls.actions
+        view.csrf_exempt = True
+        return view
+
+    def make_view(self, request, kwargs):
+        view = self.view_class()
+        if self.actions:
+            view.action_map = self.actions
+        view.args = ()
+        view.kwargs = kwargs
+        view.request = view.initialize_request(request, **kwargs)
+        view.format_kwarg = view.get_format_suffix(**kwargs)
+        view.headers = view.default_response_headers
+        return view
+
+    async def dispatch(self, request, **kwargs):
+        view = self.make_view(request, kwargs)
+        try:
+            await in_thread(view.initial)(view.request, **kwargs)
+            response = await self.get(view, view.request, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        view.response = view.finalize_response(
+            view.request, response, **kwargs
+        )
+        return view.response
+
+    async def serialize(self, view, instance, many=False):
+        data = await in_thread(
+            lambda: view.get_serializer(instance, many=many).data
+        )()
+        return Response(data)
+
+    async def conditional(self, request, conditions, respond, **kwargs):
+        """Асинхронный аналог recipes.conditional.conditional."""
+        etag_func, last_modified_func = conditions
+        etag, last_modified = await in_thread(lambda: (
+            etag_func(request, **kwargs),
+            last_modified_func(request, **kwargs),
+        ))()
+        etag = quote_etag(etag) if etag else None
+        timestamp = (
+            calendar.timegm(last_modified.utctimetuple())
+            if last_modified else None
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = await respond()
+        if timestamp:
+            response.setdefault('Last-Modified', http_date(timestamp))
+        if etag:
+            response.setdefault('ETag', etag)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_page_pagination(self, view, request):
+        """Постраничная пагинация вьюсета или None для курсорной."""
+        pagination = view.paginator
+        if isinstance(pagination, SwitchablePagination):
+            if pagination.is_cursor_mode(request):
+                return None
+            pagination = pagination.paginator
+        page_number = request.query_params.get(
+            pagination.page_query_param, '1'
+        )
+        if not page_number.isdigit() or int(page_number) < 1:
+            return None
+        if pagination.get_page_size(request) is None:
+            return None
+        return pagination
+
+    async def paginate(self, view, request, pagination, queryset, *loaders):
+        """COUNT, страница и loaders выполняются одновременно.
+
+        Возвращает None для несуществующей страницы, чтобы ошибку
+        сформировал синхронный вьюсет.
+        """
+        page_size = pagination.get_page_size(request)
+        number = int(request.query_params.get(
+            pagination.page_query_param, '1'
+        ))
+        offset = (number - 1) * page_size
+        count, items, *_ = await asyncio.gather(
+            in_thread(queryset.count)(),
+            in_thread(list)(queryset[offset:offset + page_size]),
+            *(in_thread(loader)() for loader in loaders),
+        )
+        paginator = pagination.django_paginator_class(queryset, page_size)
+        paginator.count = count
+        if number > paginator.num_pages:
+            return None
+        pagination.request = request
+        pagination.page = paginator._get_page(items, number, paginator)
+        data = await in_thread(
+            lambda: view.get_serializer(items, many=True).data
+        )()
+        return view.get_paginated_response(data)
+
+
+class RecipeListView(AsyncReadView):
+    view_class = RecipeViewSet
+    actions = {'get': 'list', 'post': 'create'}
+
+    async def get(self, view, request, **kwargs):
+        pagination = self.get_page_pagination(view, request)
+        if pagination is None:
+            return await in_thread(view.list)(request)
+        anonymous = not request.user.is_authenticated
+        if anonymous:
+            response = await in_thread(get_cached_response)(
+                request, RECIPE_LIST_CACHE_VERSIONS
+            )
+            if response is not None:
+                return response
+        with replica_reads() if anonymous else nullcontext():
+            queryset = await in_thread(
+                lambda: view.filter_queryset(view.get_queryset())
+            )()
+            response = await self.paginate(
+                view, request, pagination, queryset,
+                lambda: get_relations(request)
+            )
+        if response is None:
+            return await in_thread(view.list)(request)
+        if anonymous:
+            await in_thread(cache_response)(
+                request, RECIPE_LIST_CACHE_VERSIONS, response
+            )
+        return response
+
+
+class RecipeDetailView(AsyncReadView):
+    view_class = RecipeViewSet
+    actions = {
+        'get': 'retrieve',
+        'put': 'update',
+        'patch': 'partial_update',
+        'delete': 'destroy',
+    }
+
+    async def get(self, view, request, pk=None, **kwargs):
+        await asyncio.gather(
+            in_thread(get_relations)(request),
+            in_thread(get_recipe_state)(request, pk),
+        )
+        return await self.conditional(
+            request, (recipe_etag, recipe_last_modified),
+            lambda: self.respond(view), pk=pk
+        )
+
+    async def respond(self, view):
+        """Рецепт читается, только если клиенту нужно тело ответа."""
+        return await self.serialize(
+            view, await in_thread(view.get_object)()
+        )
+
+
+class TableReadView(AsyncReadView):
+    """Справочники: теги и ингредиенты с ETag по версии таблицы."""
+    table = None
+
+    async def get(self, view, request, **kwargs):
+        with replica_reads():
+            return await self.conditional(
+                request, table_conditions(self.table),
+                lambda: self.respond(view, request, **kwargs), **kwargs
+            )
+
+    async def respond(self, view, request, **kwargs):
+        if 'pk' in kwargs:
+            return await self.serialize(
+                view, await in_thread(view.get_object)()
+            )
+        return await self.serialize(
+            view, await in_thread(lambda: list(self.get_items(view)))(),
+            many=True
+        )
+
+    def get_items(self, view):
+        return view.filter_queryset(view.get_queryset())
+
+
+class TagListView(TableReadView):
+    view_class = TagViewSet
+    actions = {'get': 'list'}
+    table = 'tags'
+
+
+class TagDetailView(TableReadView):
+    view_class = TagViewSet
+    actions = {'get': 'retrieve'}
+    table = 'tags'
+
+
+class IngredientListView(TableReadView):
+    view_class = IngredientViewSet
+    actions = {'get': 'list'}
+    table = 'ingredients'
+
+    def get_items(self, view):
+        return view.search(view.request)
+
+
+class IngredientDetailView(TableReadView):
+    view_class = IngredientViewSet
+    actions = {'get': 'retrieve'}
+    table = 'ingredients'
@@ -0,0 +1,91 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+from recipes import constants
+from recipes.models import Ingredient
+from recipes.versions import get_version
+
+
+def ngrams(text, size):
+    return {text[index:index + size] for index in range(len(text) - size + 1)}
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов в памяти процесса.
+
+    Строится из таблицы Ingredient при первом поиске и перестраивается
+    при смене версии таблицы или по истечении интервала обновления.
+    Для поиска по подстроке хранит позиции названий для каждой
+    подстроки длиной до ngram_size символов.
+    """
+
+    refresh_interval = constants.AUTOCOMPLETE_REFRESH_INTERVAL
+    ngram_size = constants.AUTOCOMPLETE_NGRAM_SIZE
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    def build(self, version):
+        ingredients = sorted(
+            Ingredient.objects.all(),
+            key=lambda ingredient: (ingredient.name.lower(), ingredient.id)
+        )
+        names = [ingredient.name.lower() for ingredient in ingredients]
+        grams = defaultdict(list)
+        for position, name in enumerate(names):
+            for size in range(1, self.ngram_size + 1):
+                for gram in ngrams(name, size):
+                    grams[gram].append(position)
+        return version, time.monotonic(), names, ingredients, grams
+
+    def get_state(self):
+        state = self._state
+        version = get_version('ingredients')
+        if (
+            state is None
+            or state[0] != version
+            or time.monotonic() - state[1] > self.refresh_interval
+        ):
+            with self._lock:
+                if self._state is state:
+                    self._state = self.build(version)
+                state = self._state
+        return state
+
+    def search(self, query, limit=constants.AUTOCOMPLETE_LIMIT):
+        """Ингредиенты, начинающиеся с query, затем содержащие query.
+
+        Содержащие query ищутся только среди названий с самой редкой
+        из его подстрок длиной ngram_size.
+        """
+        _, _, names, ingredients, grams = self.get_state()
+        query = query.strip().lower()
+        start = bisect.bisect_left(names, query)
+        end = start
+        while (
+            end < len(names) and end - start < limit
+            and names[end].startswith(query)
+        ):
+            end += 1
+        found = ingredients[start:end]
+        if len(found) < limit and query:
+            candidates = min(
+                (
+                    grams.get(gram, ())
+                    for gram in ngrams(query, min(len(query), self.ngram_size))
+                ),
+                key=len
+            )
+            for position in candidates:
+                name = names[position]
+                if query in name and not name.startswith(query):
+                    found.append(ingredients[position])
+                    if len(found) == limit:
+                        break
+        return found
+
+
+ingredient_index = IngredientIndex()
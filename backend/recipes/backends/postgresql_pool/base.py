@@ -0,0 +1,86 @@
+import threading
+
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+DEFAULT_POOL = {'MIN_SIZE': 1, 'MAX_SIZE': 10, 'TIMEOUT': 30}
+pools = {}
+pools_lock = threading.Lock()
+
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """Пул, в котором getconn ждёт свободное соединение до timeout секунд.
+
+    ThreadedConnectionPool сразу бросает PoolError, когда все MAX_SIZE
+    соединений заняты, а потоков с запросами бывает больше.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(
+                f'Нет свободного соединения за {self.timeout} с'
+            )
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        super().putconn(conn, key, close)
+        self._slots.release()
+
+
+def get_pool(alias, settings_dict, conn_params):
+    with pools_lock:
+        if alias not in pools:
+            options = {**DEFAULT_POOL, **settings_dict.get('POOL', {})}
+            pools[alias] = BlockingConnectionPool(
+                options['MIN_SIZE'], options['MAX_SIZE'], options['TIMEOUT'],
+                **conn_params
+            )
+        return pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений внутри процесса.
+
+    При закрытии соединение возвращается в пул, поэтому запрос не тратит
+    время на установку TCP-соединения и аутентификацию.
+    """
+
+    def get_pool(self, conn_params=None):
+        return get_pool(
+            self.alias, self.settings_dict,
+            conn_params or self.get_connection_params()
+        )
+
+    @base.async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        connection = pool.getconn()
+        while connection.closed:
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda value: value
+        )
+        return connection
+
+    @base.async_unsafe
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.get_pool().putconn(self.connection)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+def is_process_local(alias):
+    return isinstance(caches[alias], LocMemCache)
+
+
+def check_shared_cache():
+    """Запрещает кэш в памяти процесса при нескольких воркерах.
+
+    В кэше по умолчанию лежат версии данных и связи пользователей:
+    изменения, сделанные одним воркером, должны видеть остальные.
+    """
+    if settings.SERVER_WORKERS > 1 and is_process_local('default'):
+        raise ImproperlyConfigured(
+            'При GUNICORN_WORKERS > 1 нужен общий для воркеров кэш: '
+            'задайте CACHE_BACKEND и CACHE_LOCATION (Memcached, файловый).'
+        )
@@ -0,0 +1,84 @@
+from functools import wraps
+
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from recipes.models import Recipe
+from recipes.relations import get_relations
+from recipes.versions import AUTHOR_VERSION, get_version, version_datetime
+
+
+def conditional(etag_func=None, last_modified_func=None):
+    """Условный GET для методов вьюсетов.
+
+    Отвечает 304 до сериализации, если клиент прислал актуальные ETag
+    или Last-Modified, и требует ревалидации при каждом запросе.
+    """
+    def decorator(func):
+        func = condition(
+            etag_func=etag_func, last_modified_func=last_modified_func
+        )(func)
+
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            response = func(request, *args, **kwargs)
+            patch_cache_control(response, no_cache=True)
+            return response
+        return inner
+    return decorator
+
+
+def table_conditions(name):
+    return (
+        lambda request, *args, **kwargs: f'{name}-{get_version(name)}',
+        lambda request, *args, **kwargs: version_datetime(get_version(name)),
+    )
+
+
+def table_conditional(name):
+    return conditional(*table_conditions(name))
+
+
+def get_recipe_state(request, pk):
+    if not hasattr(request, '_recipe_state'):
+        request._recipe_state = Recipe.objects.filter(pk=pk).values_list(
+            'updated_at', 'author_id'
+        ).first() if str(pk).isdigit() else None
+    return request._recipe_state
+
+
+def recipe_versions(author_id):
+    """Версии данных карточки, которые хранятся вне строки рецепта."""
+    return (
+        get_version('tags'),
+        get_version('ingredients'),
+        get_version(AUTHOR_VERSION.format(author_id)),
+    )
+
+
+def recipe_etag(request, pk=None, **kwargs):
+    state = get_recipe_state(request, pk)
+    if state is None:
+        return None
+    updated_at, author_id = state
+    relations = get_relations(request)
+    flags = ''.join(str(int(flag)) for flag in (
+        int(pk) in relations.favorites,
+        int(pk) in relations.shopping_cart,
+        author_id in relations.following,
+    ))
+    versions = '-'.join(map(str, recipe_versions(author_id)))
+    return f'recipe-{pk}-{updated_at.timestamp()}-{versions}-{flags}'
+
+
+def recipe_last_modified(request, pk=None, **kwargs):
+    if request.user.is_authenticated:
+        return None
+    state = get_recipe_state(request, pk)
+    if state is None:
+        return None
+    updated_at, author_id = state
+    return max(updated_at, *map(version_datetime, recipe_versions(author_id)))
+
+
+recipe_conditional = conditional(recipe_etag, recipe_last_modified)
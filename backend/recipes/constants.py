@@ -7,3 +7,31 @@ TAG_NAME_LENGHT = 20
 TAG_COLOR_LENGHT = 7
 INGREDIENT_NAME_LENGTH = 124
 INGREDIENT_MEASUREMENT_LENGTH = 10
+POPULAR_HALF_LIFE = 60 * 60 * 24 * 30
+TRENDING_HALF_LIFE = 60 * 60 * 24
+SCORE_SYNC_MARGIN = 60 * 5
+PUBLICATION_WEIGHT = 1
+FAVORITE_WEIGHT = 2
+SHOPPING_CART_WEIGHT = 3
+AUTOCOMPLETE_LIMIT = 30
+AUTOCOMPLETE_REFRESH_INTERVAL = 60 * 5
+AUTOCOMPLETE_NGRAM_SIZE = 3
+THUMBNAIL_SIZE = (480, 480)
+WEBP_MAX_SIZE = (1280, 1280)
+IMAGE_QUALITY = 80
+IMAGE_MAX_SIZE = 10 * 1024 * 1024
+RECIPE_MAX_BODY_SIZE = IMAGE_MAX_SIZE * 4 // 3 + 1024 * 1024
+BASE64_CHUNK_SIZE = 64 * 1024
+LOCAL_VERSION_TIMEOUT = 60 * 10
+TOUCHED_ROWS_HEADER = 'X-Rows-Touched'
+SEARCH_CONFIG = 'russian'
+SEARCH_NAME_WEIGHT = 4
+SEARCH_TEXT_WEIGHT = 1
+SEARCH_FALLBACK_LIMIT = 200
+COOKABLE_REFRESH_INTERVAL = 60 * 10
+COOKABLE_SYNC_MARGIN = 60
+COOKABLE_MAX_INGREDIENTS = 100
+COOKABLE_MAX_MISSING = 5
+FEED_BATCH_SIZE = 1000
+FEED_BACKFILL_LIMIT = 100
+FEED_CELEBRITY_FOLLOWERS = 5000
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from itertools import chain
+
+import numpy as np
+from django.utils import timezone
+
+from recipes import constants
+from recipes.models import IngredientRecipe, Recipe
+from recipes.versions import get_version
+
+IndexState = namedtuple(
+    'IndexState', ('version', 'built', 'synced_at', 'postings', 'sizes')
+)
+
+
+def empty_sizes(length=1):
+    return np.zeros(length, dtype=np.int64)
+
+
+class RecipeIngredientIndex:
+    """Обратный индекс «ингредиент → отсортированный массив id рецептов».
+
+    Строится из IngredientRecipe при первом запросе. При смене версии
+    рецептов догружает только рецепты, изменённые с прошлой синхронизации,
+    а полностью перестраивается раз в refresh_interval, чтобы забыть
+    удалённые рецепты.
+    """
+
+    refresh_interval = constants.COOKABLE_REFRESH_INTERVAL
+    sync_margin = timedelta(seconds=constants.COOKABLE_SYNC_MARGIN)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    def build(self, version):
+        synced_at = timezone.now()
+        rows = IngredientRecipe.objects.order_by(
+            'ingredient_id', 'recipe_id'
+        ).values_list('ingredient_id', 'recipe_id')
+        pairs = np.fromiter(
+            chain.from_iterable(rows.iterator()), dtype=np.int64
+        ).reshape(-1, 2)
+        ingredients, recipes = pairs[:, 0], pairs[:, 1]
+        bounds = np.flatnonzero(np.diff(ingredients)) + 1
+        postings = {}
+        if ingredients.size:
+            postings = {
+                int(ingredients[start]): posting
+                for start, posting in zip(
+                    np.r_[0, bounds], np.split(recipes, bounds)
+                )
+            }
+        sizes = np.bincount(recipes, minlength=1).astype(np.int64)
+        return IndexState(
+            version, time.monotonic(), synced_at, postings, sizes
+        )
+
+    def catch_up(self, state, version):
+        """Новое состояние с пересобранными изменёнными рецептами."""
+        synced_at = timezone.now()
+        changed = np.array(sorted(Recipe.objects.filter(
+            updated_at__gte=state.synced_at - self.sync_margin
+        ).values_list('id', flat=True)), dtype=np.int64)
+        if not changed.size:
+            return state._replace(version=version, synced_at=synced_at)
+        current = defaultdict(list)
+        rows = IngredientRecipe.objects.filter(
+            recipe_id__in=changed.tolist()
+        ).values_list('ingredient_id', 'recipe_id')
+        for ingredient_id, recipe_id in rows:
+            current[ingredient_id].append(recipe_id)
+        postings = dict(state.postings)
+        sizes = empty_sizes(max(state.sizes.size, int(changed[-1]) + 1))
+        sizes[:state.sizes.size] = state.sizes
+        if sizes[changed].any():
+            for ingredient_id, posting in state.postings.items():
+                positions = np.searchsorted(posting, changed).clip(
+                    max=posting.size - 1
+                )
+                hits = positions[posting[positions] == changed]
+                if hits.size:
+                    postings[ingredient_id] = np.delete(posting, hits)
+        sizes[changed] = 0
+        for ingredient_id, recipe_ids in current.items():
+            recipe_ids = np.array(recipe_ids, dtype=np.int64)
+            postings[ingredient_id] = np.union1d(
+                postings.get(ingredient_id, recipe_ids), recipe_ids
+            )
+            sizes[recipe_ids] += 1
+        postings = {
+            ingredient_id: posting
+            for ingredient_id, posting in postings.items() if posting.size
+        }
+        return state._replace(
+            version=version, synced_at=synced_at,
+            postings=postings, sizes=sizes
+        )
+
+    def get_state(self):
+        state = self._state
+        version = get_version('recipes')
+        expired = (
+            state is None
+            or time.monotonic() - state.built > self.refresh_interval
+        )
+        if expired or state.version != version:
+            with self._lock:
+                if self._state is state:
+                    self._state = (
+                        self.build(version) if expired
+                        else self.catch_up(state, version)
+                    )
+                state = self._state
+        return state
+
+    def search(self, ingredient_ids, max_missing=0):
+        """Пары (id рецепта, число недостающих ингредиентов).
+
+        Рецепт попадает в выдачу, если в нём есть хотя бы один из
+        ingredient_ids и недостаёт не больше max_missing ингредиентов.
+        Сначала идут рецепты, которым недостаёт меньше, затем рецепты
+        с большим числом совпадений, затем новые.
+        """
+        state = self.get_state()
+        postings = [
+            state.postings[pk] for pk in set(ingredient_ids)
+            if pk in state.postings
+        ]
+        if not postings:
+            return []
+        recipes, matched = np.unique(
+            np.concatenate(postings), return_counts=True
+        )
+        missing = state.sizes[recipes] - matched
+        keep = missing <= max_missing
+        recipes, matched, missing = recipes[keep], matched[keep], missing[keep]
+        order = np.lexsort((-recipes, -matched, missing))
+        return list(zip(recipes[order].tolist(), missing[order].tolist()))
+
+
+recipe_ingredient_index = RecipeIngredientIndex()
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+import django
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def replica_reads():
+    token = use_replica.set(True)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+def read_from_replica(anonymous_only=False):
+    """Направляет чтения представления в реплику.
+
+    С anonymous_only=True авторизованные пользователи читают из основной
+    базы и сразу видят свои изменения, несмотря на отставание реплики.
+    """
+    def decorator(func):
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            if anonymous_only and request.user.is_authenticated:
+                return func(request, *args, **kwargs)
+            with replica_reads():
+                return func(request, *args, **kwargs)
+        return inner
+    return decorator
+
+
+class ReplicaRouter:
+    """Чтение из реплики только внутри replica_reads и вне транзакций."""
+
+    def db_for_read(self, model, **hints):
+        if (
+            use_replica.get()
+            and REPLICA_DB_ALIAS in settings.DATABASES
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def check_connections(**kwargs):
+    """Проверка постоянных соединений для Django без CONN_HEALTH_CHECKS."""
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+if django.VERSION < (4, 1):
+    request_started.connect(check_connections)
@@ -0,0 +1,226 @@
+import base64
+import binascii
+import heapq
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+
+from recipes import constants
+from recipes.images import executor
+from recipes.models import FeedItem, Recipe
+from users.models import Follow, User
+
+logger = logging.getLogger(__name__)
+
+
+def is_celebrity(followers_count):
+    """Рецепты таких авторов не рассылаются, а читаются при запросе ленты."""
+    return followers_count >= constants.FEED_CELEBRITY_FOLLOWERS
+
+
+def feed_items(user_ids, author_id, recipes):
+    return (
+        FeedItem(
+            user_id=user_id, recipe_id=recipe_id,
+            author_id=author_id, pub_date=pub_date
+        )
+        for user_id in user_ids
+        for recipe_id, pub_date in recipes
+    )
+
+
+def send_to_followers(author_id, recipes):
+    """Добавляет рецепты в ленты подписчиков автора пачками."""
+    followers = Follow.objects.filter(author_id=author_id).order_by(
+        'user_id'
+    ).values_list('user_id', flat=True)
+    last_user = 0
+    while True:
+        batch = list(
+            followers.filter(user_id__gt=last_user)[:constants.FEED_BATCH_SIZE]
+        )
+        if not batch:
+            break
+        FeedItem.objects.bulk_create(
+            feed_items(batch, author_id, recipes),
+            batch_size=constants.FEED_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        last_user = batch[-1]
+
+
+def fan_out(recipe_id):
+    """Добавляет рецепт в ленты подписчиков, если автор не знаменит."""
+    recipe = Recipe.objects.filter(pk=recipe_id).values_list(
+        'author_id', 'pub_date', 'author__followers_count'
+    ).first()
+    if recipe is None or is_celebrity(recipe[2]):
+        return
+    author_id, pub_date, _ = recipe
+    send_to_followers(author_id, ((recipe_id, pub_date),))
+
+
+def fan_out_author(author_id):
+    """Рассылает последние рецепты автора, переставшего быть знаменитым.
+
+    Пока у автора было много подписчиков, его рецепты не рассылались,
+    а после этого get_feed читает их только из лент.
+    """
+    recipes = list(Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:constants.FEED_BACKFILL_LIMIT])
+    if recipes:
+        send_to_followers(author_id, recipes)
+
+
+def backfill(user_id, author_id):
+    """Последние рецепты автора в ленту нового подписчика.
+
+    Подписка блокируется до конца вставки, поэтому отписка, начатая
+    в это время, удалит и добавленные записи.
+    """
+    with transaction.atomic():
+        follow = Follow.objects.select_for_update().filter(
+            user_id=user_id, author_id=author_id
+        ).first()
+        if follow is None or is_celebrity(User.objects.filter(
+            pk=author_id
+        ).values_list('followers_count', flat=True).get()):
+            return
+        recipes = Recipe.objects.filter(author_id=author_id).order_by(
+            '-pub_date', '-id'
+        ).values_list('id', 'pub_date')[:constants.FEED_BACKFILL_LIMIT]
+        FeedItem.objects.bulk_create(
+            feed_items((user_id,), author_id, recipes),
+            batch_size=constants.FEED_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+
+
+def prune(user_id, author_id):
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def author_unfollowed(author_id):
+    """Вызывается после уменьшения счётчика подписчиков автора.
+
+    Счётчик уменьшается на единицу под блокировкой строки, поэтому
+    порог пересекает ровно одна отписка.
+    """
+    followers = User.objects.filter(pk=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    if followers == constants.FEED_CELEBRITY_FOLLOWERS - 1:
+        schedule(fan_out_author, author_id)
+
+
+def run_job(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Не удалось обновить ленты: %s%s',
+                         func.__name__, args)
+    finally:
+        connections.close_all()
+
+
+def schedule(func, *args):
+    """Выполняет func после коммита в пуле обработки изображений."""
+    if settings.FEED_FAN_OUT_SYNC:
+        transaction.on_commit(lambda: func(*args))
+    else:
+        transaction.on_commit(lambda: executor.submit(run_job, func, *args))
+
+
+def schedule_fan_out(recipe):
+    schedule(fan_out, recipe.id)
+
+
+def schedule_backfill(user_id, author_id):
+    schedule(backfill, user_id, author_id)
+
+
+def encode_cursor(pub_date, recipe_id):
+    return base64.urlsafe_b64encode(
+        f'{pub_date.isoformat()} {recipe_id}'.encode()
+    ).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        pub_date, recipe_id = base64.urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split(' ')
+        return datetime.fromisoformat(pub_date), int(recipe_id)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise NotFound('Неверный курсор')
+
+
+def before(cursor, id_field):
+    pub_date, recipe_id = cursor
+    return Q(pub_date__lt=pub_date) | Q(
+        pub_date=pub_date, **{f'{id_field}__lt': recipe_id}
+    )
+
+
+def get_feed(user, cursor, limit):
+    """id рецептов страницы ленты и курсор следующей страницы.
+
+    Записи ленты читаются по индексу (user, pub_date), а рецепты
+    авторов с очень большим числом подписчиков берутся из Recipe
+    и сливаются с ними по дате.
+    """
+    celebrities = list(Follow.objects.filter(
+        user=user,
+        author__followers_count__gte=constants.FEED_CELEBRITY_FOLLOWERS
+    ).values_list('author_id', flat=True))
+    items = FeedItem.objects.filter(user=user)
+    if celebrities:
+        items = items.exclude(author_id__in=celebrities)
+    if cursor is not None:
+        items = items.filter(before(cursor, 'recipe_id'))
+    rows = list(items.order_by('-pub_date', '-recipe_id').values_list(
+        'pub_date', 'recipe_id'
+    )[:limit + 1])
+    if celebrities:
+        recipes = Recipe.objects.filter(author_id__in=celebrities)
+        if cursor is not None:
+            recipes = recipes.filter(before(cursor, 'id'))
+        rows = list(heapq.merge(
+            rows,
+            recipes.order_by('-pub_date', '-id').values_list(
+                'pub_date', 'id'
+            )[:limit + 1],
+            reverse=True
+        ))[:limit + 1]
+    page = rows[:limit]
+    next_cursor = encode_cursor(*page[-1]) if len(rows) > limit else None
+    return [recipe_id for _, recipe_id in page], next_cursor
+
+
+@transaction.atomic
+def rebuild_feeds():
+    FeedItem.objects.all().delete()
+    authors = list(User.objects.filter(
+        followers_count__gt=0,
+        followers_count__lt=constants.FEED_CELEBRITY_FOLLOWERS
+    ).values_list('id', flat=True))
+    for author_id in authors:
+        recipes = list(Recipe.objects.filter(author_id=author_id).order_by(
+            '-pub_date', '-id'
+        ).values_list('id', 'pub_date')[:constants.FEED_BACKFILL_LIMIT])
+        if not recipes:
+            continue
+        FeedItem.objects.bulk_create(
+            feed_items(
+                Follow.objects.filter(author_id=author_id).values_list(
+                    'user_id', flat=True
+                ),
+                author_id, recipes
+            ),
+            batch_size=constants.FEED_BATCH_SIZE
+        )
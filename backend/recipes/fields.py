@@ -0,0 +1,108 @@
+import base64
+import binascii
+import tempfile
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from rest_framework import serializers
+
+from recipes import constants
+
+BASE64_SEPARATOR = ';base64,'
+IMAGE_MIME_PREFIX = 'data:image/'
+DEFAULT_IMAGE_EXTENSION = 'jpg'
+
+
+class Base64ImageField(serializers.ImageField):
+    """Изображение из base64-строки или из multipart-файла.
+
+    Размер проверяется до декодирования, а строка декодируется частями
+    во временный файл, который остаётся в памяти только для небольших
+    изображений.
+    """
+    default_error_messages = {
+        'too_large': 'Размер изображения больше {max_size} байт.',
+        'invalid_base64': 'Изображение должно быть в формате base64.',
+    }
+
+    def __init__(self, max_size=constants.IMAGE_MAX_SIZE, **kwargs):
+        self.max_size = max_size
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = self.decode(data)
+        elif getattr(data, 'size', 0) > self.max_size:
+            self.fail('too_large', max_size=self.max_size)
+        return super().to_internal_value(data)
+
+    def decode(self, data):
+        header, separator, encoded = data.partition(BASE64_SEPARATOR)
+        if not separator:
+            header, encoded = '', data
+        if len(encoded) // 4 * 3 > self.max_size:
+            self.fail('too_large', max_size=self.max_size)
+        extension = DEFAULT_IMAGE_EXTENSION
+        if header.startswith(IMAGE_MIME_PREFIX):
+            extension = header[len(IMAGE_MIME_PREFIX):] or extension
+        buffer = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        chunk_size = constants.BASE64_CHUNK_SIZE
+        try:
+            for start in range(0, len(encoded), chunk_size):
+                buffer.write(base64.b64decode(
+                    encoded[start:start + chunk_size], validate=True
+                ))
+        except (binascii.Error, ValueError):
+            buffer.close()
+            self.fail('invalid_base64')
+        size = buffer.tell()
+        buffer.seek(0)
+        return InMemoryUploadedFile(
+            buffer, self.field_name, f'{uuid.uuid4().hex}.{extension}',
+            f'image/{extension}', size, None
+        )
+
+
+def find_duplicates(ids):
+    return sorted(pk for pk, count in Counter(ids).items() if count > 1)
+
+
+class BulkPrimaryKeyRelatedField(serializers.ListField):
+    """Список id, который проверяется одним запросом IN.
+
+    Обо всех отсутствующих и повторяющихся id сообщается сразу.
+    """
+    default_error_messages = {
+        'does_not_exist': 'Не найдены объекты с id: {ids}.',
+        'duplicates': 'Повторяющиеся id: {ids}.',
+    }
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        kwargs.setdefault('child', serializers.IntegerField(min_value=1))
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        ids = super().to_internal_value(data)
+        objects = self.queryset.in_bulk(set(ids))
+        errors = []
+        missing = sorted({pk for pk in ids if pk not in objects})
+        if missing:
+            errors.append(self.error_messages['does_not_exist'].format(
+                ids=', '.join(map(str, missing))
+            ))
+        duplicates = find_duplicates(ids)
+        if duplicates:
+            errors.append(self.error_messages['duplicates'].format(
+                ids=', '.join(map(str, duplicates))
+            ))
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [objects[pk] for pk in ids]
+
+    def to_representation(self, value):
+        return [item.pk for item in value.all()]
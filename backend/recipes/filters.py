@@ -1,36 +1,116 @@
+from django.db.models import Exists, F, OuterRef
 from django_filters import rest_framework as rest_framework_filter
-from rest_framework.filters import SearchFilter
-from recipes.models import Recipe, User
+from rest_framework.filters import BaseFilterBackend
+from recipes.models import Favorite, Recipe, ShoppingCart, Tag, User
+from recipes.search import search_recipes
+from recipes.versions import get_version
+
+tag_map_cache = {'version': None, 'tags': {}}
+
+
+def get_tag_map():
+    """Соответствие слагов тегов их id, обновляемое по версии тегов."""
+    version = get_version('tags')
+    if tag_map_cache['version'] != version:
+        tag_map_cache['tags'] = dict(Tag.objects.values_list('slug', 'id'))
+        tag_map_cache['version'] = version
+    return tag_map_cache['tags']
+
+
+class TagSlugFilter(rest_framework_filter.MultipleChoiceFilter):
+    """Фильтр по слагам тегов через EXISTS вместо join и DISTINCT."""
+
+    @property
+    def field(self):
+        self.extra['choices'] = [(slug, slug) for slug in get_tag_map()]
+        return super().field
+
+    def filter(self, queryset, value):
+        if not value:
+            return queryset
+        tag_map = get_tag_map()
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'),
+            tag__in=[tag_map[slug] for slug in value if slug in tag_map]
+        )))
 
 
 class RecipeFilter(rest_framework_filter.FilterSet):
     author = rest_framework_filter.ModelChoiceFilter(
         queryset=User.objects.all()
     )
-    tags = rest_framework_filter.AllValuesMultipleFilter(
-        field_name='tags__slug'
-    )
+    tags = TagSlugFilter()
     is_favorited = rest_framework_filter.BooleanFilter(
         method='filter_is_favorited'
     )
     is_in_shopping_cart = rest_framework_filter.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = rest_framework_filter.CharFilter(method='filter_search')
+
+    def filter_user_list(self, queryset, model, value):
+        if not value:
+            return queryset
+        if self.request.user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(Exists(model.objects.filter(
+            user=self.request.user, recipe=OuterRef('pk')
+        )))
 
     def filter_is_favorited(self, queryset, name, value):
-        if value:
-            return queryset.filter(favorites_recipe__user=self.request.user.id)
-        return queryset
+        return self.filter_user_list(queryset, Favorite, value)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
-        if value:
-            return queryset.filter(carts__user=self.request.user.id)
-        return queryset
+        return self.filter_user_list(queryset, ShoppingCart, value)
+
+    def filter_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return search_recipes(queryset, value)
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author', 'tags', 'is_favorited', 'is_in_shopping_cart', 'search'
+        )
+
+
+class RecipeOrderingFilter(BaseFilterBackend):
+    """Сортировка ленты по рейтингу: ?ordering=popular или trending.
+
+    Результаты ?search= без явного ordering сортируются по релевантности.
+    """
+    ordering_param = 'ordering'
+    search_param = 'search'
+    rankings = {
+        'popular': 'score__popular',
+        'trending': 'score__trending',
+    }
+    default_ordering = ('-pub_date', '-id')
+    ranked_ordering = ('-rank', '-id')
+    search_ordering = ('-search_rank', '-id')
+
+    def get_ranking(self, request):
+        return self.rankings.get(
+            request.query_params.get(self.ordering_param)
+        )
+
+    def is_search(self, request):
+        return bool(request.query_params.get(self.search_param, '').strip())
 
+    def get_ordering(self, request, queryset, view):
+        if self.get_ranking(request):
+            return self.ranked_ordering
+        if self.is_search(request):
+            return self.search_ordering
+        return self.default_ordering
 
-class IngredientFilter(SearchFilter):
-    search_param = 'name'
+    def filter_queryset(self, request, queryset, view):
+        ranking = self.get_ranking(request)
+        if ranking is None:
+            if self.is_search(request):
+                return queryset.order_by(*self.search_ordering)
+            return queryset
+        return queryset.filter(score__isnull=False).annotate(
+            rank=F(ranking)
+        ).order_by(*self.ranked_ordering)
@@ -0,0 +1,86 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes import constants
+from recipes.models import Recipe
+from recipes.versions import bump_version
+
+logger = logging.getLogger(__name__)
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PIPELINE_WORKERS,
+    thread_name_prefix='recipe-images'
+)
+
+
+def render_variant(image, size, image_format):
+    """Уменьшенная копия изображения без EXIF и прочих метаданных."""
+    variant = image.copy()
+    variant.thumbnail(size)
+    if image_format == 'JPEG' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+    buffer = io.BytesIO()
+    variant.save(buffer, image_format, quality=constants.IMAGE_QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def build_variants(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return
+    with recipe.image.open('rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    name = os.path.splitext(os.path.basename(recipe.image.name))[0]
+    old_names = (recipe.thumbnail.name, recipe.image_webp.name)
+    recipe.thumbnail.save(
+        f'{name}.jpg',
+        render_variant(image, constants.THUMBNAIL_SIZE, 'JPEG'),
+        save=False
+    )
+    recipe.image_webp.save(
+        f'{name}.webp',
+        render_variant(image, constants.WEBP_MAX_SIZE, 'WEBP'),
+        save=False
+    )
+    new_names = (recipe.thumbnail.name, recipe.image_webp.name)
+    updated = Recipe.objects.filter(
+        pk=recipe_id, image=recipe.image.name
+    ).update(
+        thumbnail=new_names[0],
+        image_webp=new_names[1],
+        updated_at=timezone.now(),
+    )
+    for name in old_names if updated else new_names:
+        if name:
+            recipe.image.storage.delete(name)
+    bump_version('recipes')
+
+
+def process_image(recipe_id):
+    try:
+        build_variants(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обработать изображение рецепта %s',
+                         recipe_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_variants(recipe):
+    """Ставит построение миниатюры и WebP в очередь после коммита."""
+    if settings.IMAGE_PIPELINE_SYNC:
+        transaction.on_commit(lambda: build_variants(recipe.id))
+    else:
+        transaction.on_commit(
+            lambda: executor.submit(process_image, recipe.id)
+        )
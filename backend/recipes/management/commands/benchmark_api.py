@@ -0,0 +1,215 @@
+import base64
+import io
+import json
+import statistics
+import time
+from itertools import count
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment
+)
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, ShoppingCart, Tag
+from users.models import User
+
+IMAGE_SIZE = (600, 400)
+IMAGE_COLOR = '#4A61DD'
+RECIPE_INGREDIENTS = 10
+
+
+def encoded_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', IMAGE_SIZE, IMAGE_COLOR).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def percentile(timings, share):
+    return timings[max(int(len(timings) * share) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер API через тестовый клиент DRF: список и карточка рецепта '
+        'с фильтрами, подписки, скачивание списка покупок, создание и '
+        'изменение рецепта. Выводит p50/p95 и число запросов в JSON. '
+        'Каждый запрос идёт в своей транзакции, созданные рецепты '
+        'удаляются после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--user', help='Email пользователя, от имени которого замер.'
+        )
+        parser.add_argument('--output', help='Файл для результата.')
+        parser.add_argument(
+            '--baseline',
+            help='Результат прошлого замера для сравнения p50 и p95.'
+        )
+
+    def get_user(self, email):
+        if email:
+            user = User.objects.filter(email=email).first()
+            if user is None:
+                raise CommandError(f'Пользователь {email} не найден')
+            return user
+        buyer = ShoppingCart.objects.values('user').annotate(
+            total=Count('id')
+        ).order_by('-total').first()
+        if buyer is not None:
+            return User.objects.get(pk=buyer['user'])
+        user = User.objects.first()
+        if user is None:
+            raise CommandError('Нет пользователей, запустите generate_data')
+        return user
+
+    def get_scenarios(self, user, created):
+        recipe = Recipe.objects.order_by('-favorites_count').first()
+        if recipe is None:
+            raise CommandError('Нет рецептов, запустите generate_data')
+        tags = list(Tag.objects.values_list('id', 'slug')[:2])
+        ingredients = list(
+            Ingredient.objects.values_list('id', flat=True)[
+                :RECIPE_INGREDIENTS
+            ]
+        )
+        tag_query = '&'.join(f'tags={slug}' for _, slug in tags)
+        body = {
+            'name': 'Замер',
+            'text': 'Рецепт, созданный замером API.',
+            'cooking_time': 30,
+            'image': encoded_image(),
+            'tags': [tag_id for tag_id, _ in tags],
+            'ingredients': [
+                {'id': ingredient, 'amount': 100}
+                for ingredient in ingredients
+            ],
+        }
+        updates = count(1)
+
+        def create(client):
+            response = client.post('/api/recipes/', body, format='json')
+            if response.status_code < 400:
+                created.append(response.data['id'])
+            return response
+
+        def update(client):
+            step = next(updates)
+            return client.patch(
+                f'/api/recipes/{created[-1]}/',
+                dict(body, name=f'Замер {step}', ingredients=[
+                    {'id': ingredient, 'amount': 100 + (step + index) % 3}
+                    for index, ingredient in enumerate(ingredients)
+                ]),
+                format='json'
+            )
+
+        def get(path, anonymous=False):
+            def request(client):
+                if anonymous:
+                    return APIClient().get(path)
+                return client.get(path)
+            return request
+
+        return (
+            ('recipes_list_anonymous', get('/api/recipes/', True)),
+            ('recipes_list', get('/api/recipes/')),
+            ('recipes_list_tags', get(f'/api/recipes/?{tag_query}')),
+            ('recipes_list_favorited', get('/api/recipes/?is_favorited=1')),
+            ('recipes_list_popular', get('/api/recipes/?ordering=popular')),
+            ('recipes_list_cursor', get('/api/recipes/?pagination=cursor')),
+            ('recipe_detail', get(f'/api/recipes/{recipe.id}/')),
+            ('subscriptions', get(
+                '/api/users/subscriptions/?recipes_limit=3'
+            )),
+            ('shopping_list', get('/api/recipes/shopping_list/')),
+            ('download_shopping_cart_pdf', get(
+                '/api/recipes/download_shopping_cart/?type=pdf'
+            )),
+            ('download_shopping_cart_txt', get(
+                '/api/recipes/download_shopping_cart/?type=txt'
+            )),
+            ('recipe_create', create),
+            ('recipe_update', update),
+        )
+
+    def measure(self, name, request, client, options):
+        for _ in range(options['warmup']):
+            request(client)
+        timings = []
+        for _ in range(options['repeat']):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = request(client)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{name}: ответ {response.status_code}'
+                )
+        timings.sort()
+        return {
+            'name': name,
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'queries': len(queries),
+        }
+
+    def compare(self, results, path):
+        with open(path, 'r', encoding='utf-8') as source:
+            baseline = {
+                result['name']: result
+                for result in json.load(source)['results']
+            }
+        for result in results:
+            previous = baseline.get(result['name'])
+            if previous is None:
+                continue
+            for key in ('p50_ms', 'p95_ms'):
+                if previous[key]:
+                    result[f'{key}_change_pct'] = round(
+                        (result[key] / previous[key] - 1) * 100, 1
+                    )
+            result['queries_change'] = (
+                result['queries'] - previous['queries']
+            )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('Число повторов должно быть положительным')
+        user = self.get_user(options['user'])
+        client = APIClient()
+        client.force_authenticate(user)
+        created = []
+        setup_test_environment()
+        try:
+            results = [
+                self.measure(name, request, client, options)
+                for name, request in self.get_scenarios(user, created)
+            ]
+        finally:
+            for recipe_id in created:
+                client.delete(f'/api/recipes/{recipe_id}/')
+            teardown_test_environment()
+        if options['baseline']:
+            self.compare(results, options['baseline'])
+        report = json.dumps({
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'user': user.email,
+            'results': results,
+        }, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(report)
+        self.stdout.write(report)
@@ -0,0 +1,52 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+
+from recipes.filters import RecipeFilter
+from recipes.models import Recipe, Tag
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер времени фильтрации рецептов при увеличении числа тегов '
+        'в запросе. Результат выводится в формате JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=6)
+
+    def run_filter(self, data, limit):
+        queryset = RecipeFilter(data, queryset=Recipe.objects.all()).qs
+        queryset.count()
+        list(queryset[:limit])
+
+    def handle(self, *args, **options):
+        slugs = list(Tag.objects.values_list('slug', flat=True))
+        if not slugs:
+            raise CommandError('Нет тегов для замера')
+        results = []
+        for tags_count in range(1, len(slugs) + 1):
+            data = QueryDict(mutable=True)
+            data.setlist('tags', slugs[:tags_count])
+            timings = []
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    self.run_filter(data, options['limit'])
+                    timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results.append({
+                'tags': tags_count,
+                'p50_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(
+                    timings[int(len(timings) * 0.95) - 1], 3
+                ),
+                'queries': len(queries),
+            })
+        self.stdout.write(json.dumps(results, indent=2))
@@ -1,21 +1,269 @@
 import csv
+import gzip
+import io
+import json
 import os
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from PIL import Image
 
-from recipes.models import Ingredient
+from recipes.counters import change_counter
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag, User
+from recipes.ranking import create_score
+from recipes.versions import bump_version
+
+DEFAULT_PATHS = {
+    'ingredients': 'data/ingredients.csv',
+    'tags': 'data/tags.json',
+    'recipes': 'data/recipes.json',
+}
+MODELS = {
+    'ingredients': Ingredient,
+    'tags': Tag,
+}
+CSV_FIELDS = {
+    'ingredients': ('name', 'measurement_unit'),
+    'tags': ('name', 'color', 'slug'),
+}
+DEFAULT_BATCH_SIZE = 5000
+CHECKPOINT_SUFFIX = '.checkpoint'
+PLACEHOLDER_SIZE = (600, 400)
+PLACEHOLDER_COLOR = '#E26C2D'
+PLACEHOLDER_NAME = 'demo.png'
+
+
+def open_source(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def read_rows(path, fields):
+    """Построчно отдаёт записи csv, json или jsonl файла, в том числе .gz."""
+    name = path[:-len('.gz')] if path.endswith('.gz') else path
+    extension = os.path.splitext(name)[1]
+    with open_source(path) as source:
+        if extension == '.csv' and fields:
+            for line_number, row in enumerate(csv.reader(source), 1):
+                if len(row) != len(fields):
+                    raise CommandError(
+                        f'{path}:{line_number}: ожидается полей '
+                        f'{len(fields)}, получено {len(row)}'
+                    )
+                yield dict(zip(fields, row))
+        elif extension == '.jsonl':
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        elif extension == '.json':
+            yield from json.load(source)
+        else:
+            raise CommandError(f'Неподдерживаемый формат файла: {path}')
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+def read_checkpoint(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as checkpoint:
+            return int(checkpoint.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, processed):
+    with open(path, 'w', encoding='utf-8') as checkpoint:
+        checkpoint.write(str(processed))
+
+
+def can_copy():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor.cursor, 'copy_expert')
+
+
+def copy_batch(model, fields, batch):
+    """Загружает партию через COPY во временную таблицу.
+
+    Строки, нарушающие уникальность, пропускаются через ON CONFLICT.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    column_names = [
+        quote(model._meta.get_field(field).column) for field in fields
+    ]
+    columns = ', '.join(column_names)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [row[field] for field in fields] for row in batch
+    )
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMP TABLE import_buffer ('
+            + ', '.join(f'{column} text' for column in column_names)
+            + ') ON COMMIT DROP'
+        )
+        cursor.cursor.copy_expert(
+            f'COPY import_buffer ({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) '
+            f'SELECT {columns} FROM import_buffer ON CONFLICT DO NOTHING'
+        )
+
+
+def bulk_batch(model, fields, batch):
+    model.objects.bulk_create(
+        [model(**{field: row[field] for field in fields}) for row in batch],
+        ignore_conflicts=True
+    )
+
+
+def placeholder_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', PLACEHOLDER_SIZE, PLACEHOLDER_COLOR).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name=PLACEHOLDER_NAME)
+
+
+def recipe_image(row, base_dir):
+    if not row.get('image'):
+        return placeholder_image()
+    path = os.path.join(base_dir, row['image'])
+    with open(path, 'rb') as image:
+        return ContentFile(image.read(), name=os.path.basename(path))
+
+
+def get_author(data):
+    author, created = User.objects.get_or_create(
+        email=data['email'],
+        defaults={
+            'username': data['username'],
+            'first_name': data.get('first_name', ''),
+            'last_name': data.get('last_name', ''),
+        }
+    )
+    if created:
+        author.set_unusable_password()
+        author.save(update_fields=('password',))
+    return author
+
+
+def recipes_batch(batch, base_dir):
+    """Создаёт демо-рецепты, пропуская уже существующие у автора."""
+    tags = dict(Tag.objects.values_list('slug', 'id'))
+    names = {
+        ingredient['name']
+        for row in batch for ingredient in row['ingredients']
+    }
+    ingredients = {
+        (ingredient.name, ingredient.measurement_unit): ingredient.id
+        for ingredient in Ingredient.objects.filter(name__in=names)
+    }
+    for row in batch:
+        author = get_author(row['author'])
+        if Recipe.objects.filter(author=author, name=row['name']).exists():
+            continue
+        missing = [
+            ingredient['name'] for ingredient in row['ingredients']
+            if (ingredient['name'], ingredient['measurement_unit'])
+            not in ingredients
+        ] + [slug for slug in row['tags'] if slug not in tags]
+        if missing:
+            raise CommandError(
+                f'Рецепт «{row["name"]}»: не найдены {", ".join(missing)}'
+            )
+        recipe = Recipe(
+            author=author,
+            name=row['name'],
+            text=row['text'],
+            cooking_time=row['cooking_time'],
+        )
+        recipe.image = recipe_image(row, base_dir)
+        recipe.save()
+        recipe.tags.set([tags[slug] for slug in row['tags']])
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient_id=ingredients[
+                    (ingredient['name'], ingredient['measurement_unit'])
+                ],
+                amount=ingredient['amount'],
+            )
+            for ingredient in row['ingredients']
+        )
+        change_counter(User, author.id, 'recipes_count', 1)
+        create_score(recipe)
 
 
 class Command(BaseCommand):
-    help = 'Импорт данных из csv для модели Ingredients.'
+    help = (
+        'Потоковый импорт ингредиентов, тегов и демо-рецептов '
+        'из csv, json и jsonl файлов (в том числе сжатых gzip).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=tuple(DEFAULT_PATHS), default='ingredients',
+            help='Что импортировать.'
+        )
+        parser.add_argument(
+            '--path', help='Путь к файлу, по умолчанию из каталога data/.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одной транзакции.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с последней сохранённой партии.'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL.'
+        )
+
+    def get_loader(self, name, path, use_copy):
+        if name == 'recipes':
+            base_dir = os.path.dirname(os.path.abspath(path))
+            return lambda batch: recipes_batch(batch, base_dir)
+        model, fields = MODELS[name], CSV_FIELDS[name]
+        load = copy_batch if use_copy and can_copy() else bulk_batch
+        return lambda batch: load(model, fields, batch)
 
     def handle(self, *args, **options):
-        file_path = os.fspath('data/ingredients.csv')
-        with open(file_path, 'r', encoding='utf-8') as csv_file:
-            reader = csv.reader(csv_file)
-            try:
-                Ingredient.objects.bulk_create([Ingredient(
-                    name=name, measurement_unit=measurement_unit)
-                    for name, measurement_unit in reader])
-            except Exception as error:
-                print(f'Ошибка:{error}')
+        name = options['model']
+        path = options['path'] or DEFAULT_PATHS[name]
+        if not os.path.exists(path):
+            raise CommandError(f'Файл не найден: {path}')
+        if options['batch_size'] < 1:
+            raise CommandError('Размер партии должен быть положительным')
+        checkpoint = path + CHECKPOINT_SUFFIX
+        processed = read_checkpoint(checkpoint) if options['resume'] else 0
+        load = self.get_loader(name, path, not options['no_copy'])
+        model = MODELS.get(name, Recipe)
+        count_before = model.objects.count()
+        rows = islice(read_rows(path, CSV_FIELDS.get(name)), processed, None)
+        for batch in batches(rows, options['batch_size']):
+            with transaction.atomic():
+                load(batch)
+            processed += len(batch)
+            write_checkpoint(checkpoint, processed)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        bump_version(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано записей: {processed}, добавлено: '
+            f'{model.objects.count() - count_before}'
+        ))
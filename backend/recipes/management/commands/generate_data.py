@@ -0,0 +1,255 @@
+import io
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from recipes.counters import rebuild_counters
+from recipes.feed import rebuild_feeds
+from recipes.models import (
+    Favorite, Ingredient, IngredientRecipe, Recipe, ShoppingCart, Tag
+)
+from recipes.ranking import update_scores
+from recipes.shopping_list import rebuild_shopping_lists
+from recipes.versions import bump_version
+from users.models import Follow, User
+
+BATCH_SIZE = 5000
+SAMPLE_ATTEMPTS = 10
+IMAGE_NAME = 'recipes/images/synthetic.png'
+IMAGE_SIZE = (600, 400)
+IMAGE_COLOR = '#4A61DD'
+TAG_COLORS = ('#E26C2D', '#49B64E', '#8775D2', '#F2C94C', '#2D9CDB')
+
+
+class SkewedSampler:
+    """Выбор объектов с вероятностью, убывающей по закону Ципфа."""
+
+    def __init__(self, items, skew, rng):
+        self.items = list(items)
+        self.rng = rng
+        self.weights = list(accumulate(
+            1 / rank ** skew for rank in range(1, len(self.items) + 1)
+        ))
+
+    def sample(self, count, exclude=None):
+        """До count различных объектов; редкие могут не выпасть вовсе."""
+        chosen = set()
+        for _ in range(count * SAMPLE_ATTEMPTS):
+            if len(chosen) >= count:
+                break
+            item = self.rng.choices(self.items, cum_weights=self.weights)[0]
+            if item != exclude:
+                chosen.add(item)
+        return chosen
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерация синтетических пользователей, рецептов, избранного, '
+        'корзин и подписок с неравномерной популярностью для замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--ingredients', type=int, default=2000,
+            help='Размер справочника ингредиентов.'
+        )
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее число рецептов в избранном у пользователя.'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Среднее число рецептов в корзине у пользователя.'
+        )
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Среднее число подписок у пользователя.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа для популярности.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты публикации.'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--prefix', default='synthetic',
+            help='Префикс логинов, чтобы данные можно было найти и удалить.'
+        )
+
+    def ensure_image(self):
+        if not default_storage.exists(IMAGE_NAME):
+            buffer = io.BytesIO()
+            Image.new('RGB', IMAGE_SIZE, IMAGE_COLOR).save(buffer, 'PNG')
+            default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+        return IMAGE_NAME
+
+    def ensure_catalog(self, ingredients_needed):
+        """Теги и не меньше ingredients_needed ингредиентов."""
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=f'Тег {index}', slug=f'tag-{index}', color=color)
+                for index, color in enumerate(TAG_COLORS, 1)
+            )
+        existing = Ingredient.objects.count()
+        if ingredients_needed > existing:
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(
+                        name=f'Ингредиент {index}', measurement_unit='г'
+                    )
+                    for index in range(existing, ingredients_needed)
+                ),
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+        return (
+            list(Tag.objects.values_list('id', flat=True)),
+            list(Ingredient.objects.values_list('id', flat=True)),
+        )
+
+    def create_users(self, prefix, count):
+        users = []
+        for index in range(count):
+            user = User(
+                email=f'{prefix}{index}@example.com',
+                username=f'{prefix}{index}',
+                first_name='Тест',
+                last_name=str(index),
+            )
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(
+            users, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+        return list(User.objects.filter(
+            username__startswith=prefix
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_recipes(self, options, rng, authors, tags, ingredients):
+        now = timezone.now()
+        period = timedelta(days=options['days']).total_seconds()
+        image = self.ensure_image()
+        last_id = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=authors.sample(1).pop(),
+                    name=f'Рецепт {index}',
+                    text='Синтетический рецепт для нагрузочных замеров.',
+                    cooking_time=rng.randint(5, 180),
+                    image=image,
+                )
+                for index in range(options['recipes'])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        recipes = list(
+            Recipe.objects.filter(id__gt=last_id).order_by('id').only('id')
+        )
+        for recipe in recipes:
+            recipe.pub_date = now - timedelta(seconds=rng.random() * period)
+        Recipe.objects.bulk_update(
+            recipes, ('pub_date',), batch_size=BATCH_SIZE
+        )
+        through = Recipe.tags.through
+        through.objects.bulk_create(
+            (
+                through(recipe_id=recipe.id, tag_id=tag)
+                for recipe in recipes
+                for tag in rng.sample(tags, rng.randint(1, min(3, len(tags))))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        IngredientRecipe.objects.bulk_create(
+            (
+                IngredientRecipe(
+                    recipe_id=recipe.id, ingredient_id=ingredient,
+                    amount=rng.randint(1, 500)
+                )
+                for recipe in recipes
+                for ingredient in ingredients.sample(
+                    options['ingredients_per_recipe']
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return [recipe.id for recipe in recipes]
+
+    def create_lists(self, model, users, recipes, average, rng, period):
+        now = timezone.now()
+        model.objects.bulk_create(
+            (
+                model(
+                    user_id=user, recipe_id=recipe,
+                    created=now - timedelta(seconds=rng.random() * period)
+                )
+                for user in users
+                for recipe in recipes.sample(rng.randint(0, 2 * average))
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['recipes'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь и рецепт')
+        rng = random.Random(options['seed'])
+        period = timedelta(days=options['days']).total_seconds()
+        with transaction.atomic():
+            tags, ingredients = self.ensure_catalog(max(
+                options['ingredients'], options['ingredients_per_recipe']
+            ))
+            ingredients = SkewedSampler(
+                rng.sample(ingredients, len(ingredients)), options['skew'], rng
+            )
+            users = self.create_users(options['prefix'], options['users'])
+            authors = SkewedSampler(users, options['skew'], rng)
+            recipe_ids = self.create_recipes(
+                options, rng, authors, tags, ingredients
+            )
+            popular = SkewedSampler(
+                rng.sample(recipe_ids, len(recipe_ids)), options['skew'], rng
+            )
+            self.create_lists(
+                Favorite, users, popular, options['favorites'], rng, period
+            )
+            self.create_lists(
+                ShoppingCart, users, popular, options['carts'], rng, period
+            )
+            Follow.objects.bulk_create(
+                (
+                    Follow(user_id=user, author_id=author)
+                    for user in users
+                    for author in authors.sample(
+                        rng.randint(0, 2 * options['follows']), exclude=user
+                    )
+                ),
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            rebuild_counters()
+            rebuild_shopping_lists()
+            rebuild_feeds()
+        update_scores(full=True)
+        for name in ('tags', 'ingredients', 'recipes'):
+            bump_version(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)}, '
+            f'рецептов: {len(recipe_ids)}'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import rebuild_counters
+from recipes.feed import rebuild_feeds
+from recipes.shopping_list import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт счётчиков избранного, покупок, рецептов и подписчиков, '
+        'списков покупок и лент подписок пользователей.'
+    )
+
+    def handle(self, *args, **options):
+        rebuild_counters()
+        rebuild_shopping_lists()
+        rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            'Счётчики, списки покупок и ленты пересчитаны'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from recipes.ranking import update_scores
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт рейтингов популярности рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать рейтинги с нуля, а не только новые события.'
+        )
+
+    def handle(self, *args, **options):
+        updated = update_scores(full=options['full'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено рейтингов: {updated}')
+        )
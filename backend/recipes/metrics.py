@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework import serializers
+
+from recipes.response_cache import response_cache_metrics
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+UNRESOLVED_VIEW = 'unresolved'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+current_metrics = ContextVar('current_metrics', default=None)
+extra_counters = {'response_cache': response_cache_metrics}
+
+
+class ViewStats:
+    __slots__ = ('requests', 'wall', 'queries', 'db', 'serialize', 'buckets')
+
+    def __init__(self):
+        self.requests = 0
+        self.wall = self.db = self.serialize = 0.0
+        self.queries = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+
+view_stats = defaultdict(ViewStats)
+view_stats_lock = threading.Lock()
+
+
+def find_serializer_frame():
+    """Метод сериализатора, из которого выполняется запрос к БД."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        owner = frame.f_locals.get('self')
+        filename = frame.f_code.co_filename
+        if (
+            isinstance(owner, (serializers.BaseSerializer,
+                               serializers.Field))
+            and 'rest_framework' not in filename
+            and filename != __file__
+        ):
+            return f'{type(owner).__name__}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class RequestMetrics:
+    """Счётчики одного запроса.
+
+    Запросы к БД могут выполняться из нескольких потоков сразу
+    (асинхронные представления), поэтому счётчики защищены блокировкой.
+    """
+
+    def __init__(self, trace_queries=False):
+        self.lock = threading.Lock()
+        self.view = UNRESOLVED_VIEW
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serializing = False
+        self.trace_queries = trace_queries
+        self.statements = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            origin = None
+            if self.trace_queries and sql not in self.origins:
+                origin = find_serializer_frame()
+            with self.lock:
+                self.db += duration
+                self.queries += 1
+                if self.trace_queries:
+                    self.statements[sql] += 1
+                    self.origins.setdefault(sql, origin)
+
+    def log_duplicates(self, threshold):
+        for sql, count in self.statements.items():
+            if count >= threshold:
+                logger.warning(
+                    '%s: запрос выполнен %s раз (%s): %s',
+                    self.view, count,
+                    self.origins[sql] or 'вне сериализатора', sql
+                )
+
+    def server_timing(self, wall):
+        return (
+            f'app;dur={wall * 1000:.1f}, '
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries", '
+            f'serialize;dur={self.serialize * 1000:.1f}'
+        )
+
+
+def execute_with_metrics(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if execute_with_metrics not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_with_metrics)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+def view_name(request, view_func):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', UNRESOLVED_VIEW)
+    actions = getattr(view_func, 'actions', None)
+    if not actions:
+        return view_class.__name__
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def record(metrics, wall):
+    with view_stats_lock:
+        stats = view_stats[metrics.view]
+        stats.requests += 1
+        stats.wall += wall
+        stats.queries += metrics.queries
+        stats.db += metrics.db
+        stats.serialize += metrics.serialize
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if wall <= bound:
+                stats.buckets[index] += 1
+
+
+@contextmanager
+def timed_serialization():
+    metrics = current_metrics.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize += time.perf_counter() - start
+        metrics.serializing = False
+
+
+class TimedSerializerMixin:
+    """Учитывает время построения serializer.data в метриках запроса."""
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class TimedModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    pass
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """Время ответа, число и время запросов к БД и время сериализации.
+
+    Значения отдаются в заголовке Server-Timing и накапливаются
+    по представлениям для metrics_view. Работает и под WSGI, и под ASGI.
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.acall(request)
+        metrics, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(metrics, start, response)
+
+    async def acall(self, request):
+        metrics, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(metrics, start, response)
+
+    def start(self):
+        metrics = RequestMetrics(settings.METRICS_LOG_DUPLICATE_QUERIES)
+        return metrics, current_metrics.set(metrics), time.perf_counter()
+
+    def finish(self, metrics, start, response):
+        wall = time.perf_counter() - start
+        record(metrics, wall)
+        response['Server-Timing'] = metrics.server_timing(wall)
+        if metrics.trace_queries:
+            metrics.log_duplicates(settings.METRICS_DUPLICATE_QUERY_THRESHOLD)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.view = view_name(request, view_func)
+
+
+def render_metrics():
+    """Текстовый формат Prometheus."""
+    with view_stats_lock:
+        snapshot = [
+            (f'view="{view}"', stats) for view, stats in sorted(
+                view_stats.items()
+            )
+        ]
+        lines = ['# TYPE foodgram_requests_total counter']
+        lines += [
+            f'foodgram_requests_total{{{label}}} {stats.requests}'
+            for label, stats in snapshot
+        ]
+        lines.append('# TYPE foodgram_request_duration_seconds histogram')
+        for label, stats in snapshot:
+            bounds = [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+            counts = stats.buckets + [stats.requests]
+            lines += [
+                'foodgram_request_duration_seconds_bucket'
+                f'{{{label},le="{bound}"}} {count}'
+                for bound, count in zip(bounds, counts)
+            ]
+            lines += [
+                'foodgram_request_duration_seconds_sum'
+                f'{{{label}}} {stats.wall:.6f}',
+                'foodgram_request_duration_seconds_count'
+                f'{{{label}}} {stats.requests}',
+            ]
+        for name, field in (
+            ('db_queries_total', 'queries'),
+            ('db_duration_seconds_total', 'db'),
+            ('serialize_duration_seconds_total', 'serialize'),
+        ):
+            lines.append(f'# TYPE foodgram_{name} counter')
+            lines += [
+                f'foodgram_{name}{{{label}}} {getattr(stats, field)}'
+                for label, stats in snapshot
+            ]
+    for name, counter in sorted(extra_counters.items()):
+        lines.append(f'# TYPE foodgram_{name}_total counter')
+        lines += [
+            f'foodgram_{name}_total{{event="{event}"}} {count}'
+            for event, count in sorted(counter.items())
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and request.META.get('HTTP_AUTHORIZATION') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -2,6 +2,7 @@ from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from recipes import constants
 
@@ -51,6 +52,14 @@ class Recipe(models.Model):
     name = models.CharField(
         'Название рецепта', max_length=constants.MAX_RECIPE_NAME_LENGTH)
     image = models.ImageField('Изображение', upload_to='recipes/images/')
+    thumbnail = models.ImageField(
+        'Миниатюра', upload_to='recipes/thumbnails/', blank=True,
+        editable=False
+    )
+    image_webp = models.ImageField(
+        'Изображение WebP', upload_to='recipes/webp/', blank=True,
+        editable=False
+    )
     text = models.TextField('Описание')
     author = models.ForeignKey(
         User,
@@ -79,11 +88,35 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное', default=0, editable=False
+    )
+    carts_count = models.PositiveIntegerField(
+        'Добавлений в список покупок', default=0, editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('updated_at',),
+                name='recipe_updated_at_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.name} ({self.author})'
@@ -131,6 +164,9 @@ class AbstractList(models.Model):
         Recipe,
         on_delete=models.CASCADE
     )
+    created = models.DateTimeField(
+        'Дата добавления', default=timezone.now, db_index=True
+    )
 
     class Meta:
         abstract = True
@@ -162,3 +198,126 @@ class ShoppingCart(AbstractList):
                 name='uniq_cart_user_recipe'
             ),
         )
+
+
+class ShoppingListItem(models.Model):
+    """Ингредиент списка покупок, просуммированный по корзине.
+
+    Обновляется вместе с корзиной и составом рецептов из неё.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField('Количество')
+    recipes_count = models.PositiveIntegerField('Рецептов в корзине')
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='uniq_shopping_list_user_ingredient'
+            ),
+        )
+
+
+class FeedItem(models.Model):
+    """Рецепт в ленте подписчика.
+
+    Строки добавляются при публикации рецепта и при подписке на автора.
+    Дата публикации продублирована для постраничного обхода по индексу.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='uniq_feed_user_recipe'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='feed_user_author_idx'
+            ),
+        )
+
+
+class RecipeScore(models.Model):
+    """Рейтинги рецепта с экспоненциальным затуханием по времени.
+
+    Хранятся в логарифмической шкале относительно фиксированной даты,
+    поэтому новые события добавляются без пересчёта старых.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Рецепт',
+    )
+    popular = models.FloatField('Популярность')
+    trending = models.FloatField('Тренд')
+    updated_at = models.DateTimeField(
+        'Обновлён', default=timezone.now, db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = (
+            models.Index(fields=('-popular',), name='score_popular_idx'),
+            models.Index(fields=('-trending',), name='score_trending_idx'),
+        )
+
+
+class ScoreWatermark(models.Model):
+    """Граница событий, учтённых последним пересчётом рейтингов.
+
+    Одна строка. Граница отстаёт от начала пересчёта на запас, чтобы
+    не потерять события, закоммиченные позже своей отметки created;
+    учтённые события из этого запаса перечислены в counted_events.
+    """
+    events_until = models.DateTimeField('Учтены события до')
+    counted_events = models.JSONField(
+        'Учтённые события после границы', default=dict, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Отметка пересчёта рейтингов'
+        verbose_name_plural = 'Отметки пересчёта рейтингов'
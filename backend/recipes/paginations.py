@@ -3,3 +3,62 @@ from rest_framework import pagination
 
 class CustomPageNumberPagination(pagination.PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(pagination.CursorPagination):
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+
+
+class SubscriptionsCursorPagination(pagination.CursorPagination):
+    page_size_query_param = 'limit'
+    ordering = ('username',)
+
+
+class SwitchablePagination(pagination.BasePagination):
+    """Постраничная пагинация, либо курсорная по ?pagination=cursor.
+
+    Курсорный режим не выполняет COUNT(*) и OFFSET, поэтому глубокие
+    страницы отдаются так же быстро, как первая.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    page_pagination_class = CustomPageNumberPagination
+    cursor_pagination_class = RecipeCursorPagination
+
+    def __init__(self):
+        self.paginator = self.page_pagination_class()
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = self.cursor_pagination_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+
+class RecipePagination(SwitchablePagination):
+    cursor_pagination_class = RecipeCursorPagination
+
+
+class SubscriptionsPagination(SwitchablePagination):
+    cursor_pagination_class = SubscriptionsCursorPagination
@@ -0,0 +1,53 @@
+import json
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import DataAndFiles, JSONParser, MultiPartParser
+
+from recipes import constants
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Слишком большой запрос.'
+    default_code = 'request_too_large'
+
+
+class ContentLengthLimitMixin:
+    """Отклоняет запрос по Content-Length до чтения тела."""
+    max_content_length = constants.RECIPE_MAX_BODY_SIZE
+
+    def check_content_length(self, parser_context):
+        request = (parser_context or {}).get('request')
+        if request is None:
+            return
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length > self.max_content_length:
+            raise RequestTooLarge()
+
+
+class RecipeJSONParser(ContentLengthLimitMixin, JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        self.check_content_length(parser_context)
+        return super().parse(stream, media_type, parser_context)
+
+
+class RecipeMultiPartParser(ContentLengthLimitMixin, MultiPartParser):
+    """Multipart-форма рецепта: файл image, теги списком полей tags
+    и ингредиенты JSON-строкой в поле ingredients."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        self.check_content_length(parser_context)
+        parsed = super().parse(stream, media_type, parser_context)
+        data = {key: parsed.data.get(key) for key in parsed.data}
+        if 'tags' in parsed.data:
+            data['tags'] = parsed.data.getlist('tags')
+        if 'ingredients' in data:
+            try:
+                data['ingredients'] = json.loads(data['ingredients'])
+            except ValueError as error:
+                raise ParseError(f'ingredients: {error}')
+        return DataAndFiles(data, parsed.files.dict())
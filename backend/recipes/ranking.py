@@ -0,0 +1,151 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+from django.db import transaction
+from django.utils import timezone as django_timezone
+
+from recipes import constants
+from recipes.models import (
+    Favorite, Recipe, RecipeScore, ScoreWatermark, ShoppingCart
+)
+from recipes.versions import bump_version
+
+SCORE_EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+SCORE_FIELDS = {
+    'popular': constants.POPULAR_HALF_LIFE,
+    'trending': constants.TRENDING_HALF_LIFE,
+}
+EVENTS = (
+    (Favorite, constants.FAVORITE_WEIGHT),
+    (ShoppingCart, constants.SHOPPING_CART_WEIGHT),
+)
+BATCH_SIZE = 1000
+WATERMARK_ID = 1
+SYNC_MARGIN = timedelta(seconds=constants.SCORE_SYNC_MARGIN)
+
+
+def logaddexp(first, second):
+    if first is None:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def event_score(moment, weight, half_life):
+    """Логарифм вклада события, затухающего с периодом half_life.
+
+    Вклад растёт с датой события: сравнение таких значений равносильно
+    сравнению затухших к текущему моменту весов.
+    """
+    age = (moment - SCORE_EPOCH).total_seconds()
+    return math.log(weight) + age / half_life * math.log(2)
+
+
+def publication_scores(pub_date):
+    return {
+        field: event_score(pub_date, constants.PUBLICATION_WEIGHT, half_life)
+        for field, half_life in SCORE_FIELDS.items()
+    }
+
+
+def create_score(recipe):
+    return RecipeScore.objects.create(
+        recipe=recipe, **publication_scores(recipe.pub_date)
+    )
+
+
+def collect_events(scores, until, since=None, counted=None):
+    """Добавляет в scores события после since, кроме уже учтённых.
+
+    Возвращает идентификаторы событий после until по моделям: при
+    следующем пересчёте они не будут учтены повторно.
+    """
+    counted = counted or {}
+    recent = {}
+    for model, weight in EVENTS:
+        label = model._meta.model_name
+        skipped = set(counted.get(label, ()))
+        events = model.objects.values_list('id', 'recipe_id', 'created')
+        if since is not None:
+            events = events.filter(created__gt=since)
+        recent[label] = []
+        for event_id, recipe_id, created in events.iterator():
+            if created > until:
+                recent[label].append(event_id)
+            if event_id in skipped:
+                continue
+            recipe_scores = scores.setdefault(recipe_id, {})
+            for field, half_life in SCORE_FIELDS.items():
+                recipe_scores[field] = logaddexp(
+                    recipe_scores.get(field),
+                    event_score(created, weight, half_life)
+                )
+    return recent
+
+
+def save_scores(scores, now):
+    existing = RecipeScore.objects.in_bulk(list(scores))
+    updated = []
+    for recipe_id, recipe_scores in scores.items():
+        score = existing.get(recipe_id)
+        if score is None:
+            continue
+        for field, value in recipe_scores.items():
+            setattr(score, field, logaddexp(getattr(score, field), value))
+        score.updated_at = now
+        updated.append(score)
+    RecipeScore.objects.bulk_update(
+        updated, (*SCORE_FIELDS, 'updated_at'), batch_size=BATCH_SIZE
+    )
+    return len(updated)
+
+
+def create_missing_scores(now):
+    recipes = Recipe.objects.filter(score__isnull=True).values_list(
+        'id', 'pub_date'
+    )
+    RecipeScore.objects.bulk_create(
+        (
+            RecipeScore(
+                recipe_id=recipe_id, updated_at=now,
+                **publication_scores(pub_date)
+            )
+            for recipe_id, pub_date in recipes.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+@transaction.atomic
+def update_scores(full=False):
+    """Добавляет к рейтингам события с прошлого пересчёта.
+
+    created ставится до коммита события, поэтому граница учтённых
+    событий отстаёт от начала пересчёта на SCORE_SYNC_MARGIN, а события
+    после неё, уже учтённые прошлым пересчётом, пропускаются. События,
+    чья транзакция длилась дольше запаса, и удаления из избранного и
+    корзины учитываются только при полном пересчёте (full=True),
+    который стоит запускать периодически.
+    Без отметки прошлого пересчёта рейтинги считаются с нуля.
+    """
+    now = django_timezone.now()
+    until = now - SYNC_MARGIN
+    watermark = ScoreWatermark.objects.select_for_update().filter(
+        pk=WATERMARK_ID
+    ).first()
+    if full or watermark is None:
+        RecipeScore.objects.all().delete()
+        since, counted = None, None
+    else:
+        since, counted = watermark.events_until, watermark.counted_events
+    create_missing_scores(now)
+    scores = {}
+    recent = collect_events(scores, until, since, counted)
+    updated = save_scores(scores, now)
+    ScoreWatermark.objects.update_or_create(
+        pk=WATERMARK_ID,
+        defaults={'events_until': until, 'counted_events': recent},
+    )
+    bump_version('recipes')
+    return updated
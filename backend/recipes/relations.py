@@ -0,0 +1,55 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Favorite, ShoppingCart
+from recipes.versions import bump_version, get_version
+from users.models import Follow
+
+RELATIONS_CACHE_KEY = 'relations:{}:{}'
+RELATIONS_VERSION = 'relations:{}'
+
+UserRelations = namedtuple(
+    'UserRelations', ('favorites', 'shopping_cart', 'following')
+)
+EMPTY_RELATIONS = UserRelations(frozenset(), frozenset(), frozenset())
+
+
+def load_relations(user_id):
+    return UserRelations(
+        favorites=frozenset(Favorite.objects.filter(
+            user=user_id).values_list('recipe_id', flat=True)),
+        shopping_cart=frozenset(ShoppingCart.objects.filter(
+            user=user_id).values_list('recipe_id', flat=True)),
+        following=frozenset(Follow.objects.filter(
+            user=user_id).values_list('author_id', flat=True)),
+    )
+
+
+def get_relations(request):
+    """Избранное, корзина и подписки пользователя запроса.
+
+    Множества хранятся в кэше и запоминаются на объекте запроса,
+    поэтому флаги сериализаторов проверяются без обращения к БД.
+    Ключ включает версию, прочитанную до загрузки: если изменение
+    закоммитят во время загрузки, запись сохранится под старой версией
+    и читаться уже не будет.
+    """
+    if request is None or request.user.is_anonymous:
+        return EMPTY_RELATIONS
+    relations = getattr(request, '_relations', None)
+    if relations is None:
+        key = RELATIONS_CACHE_KEY.format(request.user.id, get_version(
+            RELATIONS_VERSION.format(request.user.id)
+        ))
+        relations = cache.get(key)
+        if relations is None:
+            relations = load_relations(request.user.id)
+            cache.set(key, relations, settings.RELATIONS_CACHE_TIMEOUT)
+        request._relations = relations
+    return relations
+
+
+def invalidate_relations(user_id):
+    bump_version(RELATIONS_VERSION.format(user_id))
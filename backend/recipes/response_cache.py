@@ -0,0 +1,67 @@
+import hashlib
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from recipes.versions import get_version
+
+RESPONSE_CACHE_KEY = 'response:{}:{}'
+response_cache_metrics = Counter()
+
+
+def response_cache_key(request, versions):
+    query = sorted(
+        (key, sorted(request.query_params.getlist(key)))
+        for key in request.query_params
+    )
+    fingerprint = hashlib.sha256(repr((
+        request.get_host(),
+        request.path,
+        query,
+        [get_version(name) for name in versions],
+    )).encode()).hexdigest()
+    return RESPONSE_CACHE_KEY.format(request.path, fingerprint)
+
+
+def get_cached_response(request, versions):
+    cache = caches[settings.RESPONSE_CACHE_ALIAS]
+    data = cache.get(response_cache_key(request, versions))
+    if data is None:
+        response_cache_metrics['misses'] += 1
+        return None
+    response_cache_metrics['hits'] += 1
+    return Response(data, headers={'X-Cache': 'HIT'})
+
+
+def cache_response(request, versions, response):
+    if response.status_code == 200:
+        caches[settings.RESPONSE_CACHE_ALIAS].set(
+            response_cache_key(request, versions), response.data,
+            settings.RESPONSE_CACHE_TIMEOUT
+        )
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def anonymous_response_cache(*versions):
+    """Кэширует ответы анонимным пользователям.
+
+    Ключ включает нормализованные параметры запроса и версии наборов
+    данных versions, поэтому любое их изменение делает кэш неактуальным.
+    """
+    def decorator(func):
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return func(request, *args, **kwargs)
+            response = get_cached_response(request, versions)
+            if response is not None:
+                return response
+            return cache_response(
+                request, versions, func(request, *args, **kwargs)
+            )
+        return inner
+    return decorator
@@ -0,0 +1,148 @@
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+
+from recipes import constants
+from recipes.models import Recipe
+from recipes.versions import get_version
+
+TOKEN_RE = re.compile(r'\w+')
+SEARCH_COLUMN = 'search_vector'
+SEARCH_INDEX = 'recipes_recipe_search_vector_gin'
+TSQUERY = 'websearch_to_tsquery(%s::regconfig, %s)'
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+
+
+def create_search_index(using, **kwargs):
+    """Колонка tsvector и GIN-индекс для полнотекстового поиска.
+
+    Колонка генерируемая, поэтому PostgreSQL сам пересчитывает её
+    при каждой записи рецепта. Нужен PostgreSQL 12 и новее.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    table = connection.ops.quote_name(Recipe._meta.db_table)
+    config = constants.SEARCH_CONFIG
+    vector = (
+        f"setweight(to_tsvector('{config}', coalesce(name, '')), 'A') || "
+        f"setweight(to_tsvector('{config}', coalesce(text, '')), 'B')"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {SEARCH_COLUMN} '
+            f'tsvector GENERATED ALWAYS AS ({vector}) STORED'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} '
+            f'ON {table} USING gin ({SEARCH_COLUMN})'
+        )
+
+
+class RecipeSearchIndex:
+    """Обратный индекс слов названия и описания рецептов в памяти.
+
+    Используется вместо tsvector, если база не PostgreSQL.
+    Перестраивается при смене версии рецептов.
+    """
+
+    name_weight = constants.SEARCH_NAME_WEIGHT
+    text_weight = constants.SEARCH_TEXT_WEIGHT
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    def build(self, version):
+        postings = defaultdict(dict)
+        recipes = Recipe.objects.values_list('id', 'name', 'text')
+        for recipe_id, name, text in recipes.iterator():
+            for weight, value in (
+                (self.name_weight, name), (self.text_weight, text)
+            ):
+                for token in tokenize(value):
+                    scores = postings[token]
+                    scores[recipe_id] = scores.get(recipe_id, 0) + weight
+        tokens = sorted(postings)
+        total = len(recipes)
+        return version, tokens, [postings[token] for token in tokens], total
+
+    def get_state(self):
+        state = self._state
+        version = get_version('recipes')
+        if state is None or state[0] != version:
+            with self._lock:
+                if self._state is state:
+                    self._state = self.build(version)
+                state = self._state
+        return state
+
+    def search(self, query):
+        """Оценки рецептов, содержащих все слова query.
+
+        Слово запроса совпадает с любым словом, которое с него
+        начинается, оценка взвешивается по редкости слова.
+        """
+        _, tokens, postings, total = self.get_state()
+        found = None
+        for word in set(tokenize(query)):
+            scores = defaultdict(float)
+            start = bisect.bisect_left(tokens, word)
+            end = start
+            while end < len(tokens) and tokens[end].startswith(word):
+                for recipe_id, score in postings[end].items():
+                    scores[recipe_id] += score
+                end += 1
+            if not scores:
+                return {}
+            rarity = math.log(1 + total / len(scores))
+            if found is None:
+                found = {
+                    recipe_id: score * rarity
+                    for recipe_id, score in scores.items()
+                }
+                continue
+            found = {
+                recipe_id: score + scores[recipe_id] * rarity
+                for recipe_id, score in found.items()
+                if recipe_id in scores
+            }
+        return found or {}
+
+
+recipe_search_index = RecipeSearchIndex()
+
+
+def search_recipes(queryset, query):
+    """Рецепты, подходящие под query, с оценкой в аннотации search_rank."""
+    if connections[queryset.db].vendor == 'postgresql':
+        table = connections[queryset.db].ops.quote_name(
+            Recipe._meta.db_table
+        )
+        column = f'{table}.{SEARCH_COLUMN}'
+        params = (constants.SEARCH_CONFIG, query)
+        return queryset.filter(RawSQL(
+            f'{column} @@ {TSQUERY}', params, output_field=BooleanField()
+        )).annotate(search_rank=RawSQL(
+            f'ts_rank({column}, {TSQUERY})', params,
+            output_field=FloatField()
+        ))
+    scores = sorted(
+        recipe_search_index.search(query).items(),
+        key=lambda item: item[1], reverse=True
+    )[:constants.SEARCH_FALLBACK_LIMIT]
+    return queryset.filter(pk__in=[pk for pk, _ in scores]).annotate(
+        search_rank=Case(
+            *(When(pk=pk, then=Value(score)) for pk, score in scores),
+            default=Value(0.0), output_field=FloatField()
+        )
+    )
@@ -1,37 +1,45 @@
 from django.db import transaction
-from django.shortcuts import get_object_or_404
-from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
-from users.models import Follow
+from recipes import constants
+from recipes.counters import change_counter
+from recipes.fields import (
+    Base64ImageField, BulkPrimaryKeyRelatedField, find_duplicates
+)
+from recipes.feed import schedule_fan_out
+from recipes.images import schedule_variants
+from recipes.metrics import TimedListSerializer, TimedModelSerializer
 from recipes.models import (
-    Favorite, Ingredient, IngredientRecipe, Recipe, ShoppingCart, Tag, User
+    Favorite, Ingredient, IngredientRecipe, Recipe, ShoppingCart,
+    ShoppingListItem, Tag, User
 )
+from recipes.ranking import create_score
+from recipes.relations import get_relations
+from recipes.shopping_list import recipe_changed
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedModelSerializer):
     class Meta:
         fields = ('id', 'name', 'measurement_unit')
         model = Ingredient
         read_only_fields = ('id', 'name', 'measurement_unit')
+        list_serializer_class = TimedListSerializer
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedModelSerializer):
     class Meta:
         fields = ('id', 'name', 'color', 'slug')
         model = Tag
         read_only_fields = ('id', 'name', 'color', 'slug')
+        list_serializer_class = TimedListSerializer
 
 
 class AuthorSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        return Follow.objects.filter(
-            user=request.user, author=obj.pk).exists()
+        relations = get_relations(self.context.get('request'))
+        return obj.pk in relations.following
 
     class Meta:
         model = User
@@ -63,7 +71,7 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeListSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(TimedModelSerializer):
     author = AuthorSerializer(read_only=True)
     ingredients = serializers.SerializerMethodField()
     tags = TagSerializer(many=True)
@@ -71,23 +79,17 @@ class RecipeListSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     def get_ingredients(self, obj):
-        queryset = IngredientRecipe.objects.filter(recipe=obj)
-        return IngredientRecipeSerializer(queryset, many=True).data
+        return IngredientRecipeSerializer(
+            obj.ingredient_to_recipe.all(), many=True
+        ).data
 
     def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return Favorite.objects.filter(user=user.id, recipe=obj.id).exists()
+        relations = get_relations(self.context.get('request'))
+        return obj.id in relations.favorites
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(
-            user=user.id,
-            recipe=obj.id
-        ).exists()
+        relations = get_relations(self.context.get('request'))
+        return obj.id in relations.shopping_cart
 
     class Meta:
         model = Recipe
@@ -100,25 +102,57 @@ class RecipeListSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'thumbnail',
+            'image_webp',
             'text',
             'cooking_time'
         )
+        list_serializer_class = TimedListSerializer
+
+
+class IngredientListSerializer(serializers.ListSerializer):
+    """Проверяет все ингредиенты рецепта одним запросом."""
+    default_error_messages = {
+        'does_not_exist': 'Ингредиент {id} не найден.',
+        'duplicate': 'Ингредиент {id} указан несколько раз.',
+    }
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ids = [item['id'] for item in items]
+        ingredients = Ingredient.objects.in_bulk(set(ids))
+        duplicates = set(find_duplicates(ids))
+        errors = []
+        for pk in ids:
+            if pk not in ingredients:
+                errors.append({'id': [
+                    self.error_messages['does_not_exist'].format(id=pk)
+                ]})
+            elif pk in duplicates:
+                errors.append({'id': [
+                    self.error_messages['duplicate'].format(id=pk)
+                ]})
+            else:
+                errors.append({})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        for item in items:
+            item['id'] = ingredients[item['id']]
+        return items
 
 
 class IngredientCreateSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = IngredientRecipe
         fields = ('id', 'amount')
+        list_serializer_class = IngredientListSerializer
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedModelSerializer):
     author = AuthorSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all()
-    )
+    tags = BulkPrimaryKeyRelatedField(queryset=Tag.objects.all())
     ingredients = IngredientCreateSerializer(many=True)
     image = Base64ImageField()
 
@@ -139,6 +173,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         if not tags:
             raise serializers.ValidationError('нужен хотя бы один тег')
         recipe = Recipe.objects.create(**validated_data)
+        change_counter(User, recipe.author_id, 'recipes_count', 1)
+        create_score(recipe)
+        schedule_variants(recipe)
+        schedule_fan_out(recipe)
         recipe.tags.set(tags)
         ingredients_list = [
             IngredientRecipe(
@@ -151,39 +189,74 @@ class RecipeSerializer(serializers.ModelSerializer):
         IngredientRecipe.objects.bulk_create(ingredients_list)
         return recipe
 
+    def sync_tags(self, recipe, tags):
+        current = {tag.id for tag in recipe.tags.all()}
+        wanted = {tag.id for tag in tags}
+        removed, added = current - wanted, wanted - current
+        if removed:
+            recipe.tags.remove(*removed)
+        if added:
+            recipe.tags.add(*added)
+        return {'tags_added': len(added), 'tags_removed': len(removed)}
+
+    def sync_ingredients(self, recipe, ingredients):
+        """Меняет только отличающиеся строки IngredientRecipe.
+
+        bulk-операции не шлют сигналов, поэтому списки покупок для
+        новых и изменённых строк обновляются здесь, а удалённые строки
+        вычитает сигнал post_delete.
+        """
+        existing = {
+            row.ingredient_id: row
+            for row in recipe.ingredient_to_recipe.all()
+        }
+        wanted = {
+            ingredient['id'].id: ingredient['amount']
+            for ingredient in ingredients
+        }
+        created = [
+            IngredientRecipe(recipe=recipe, ingredient_id=pk, amount=amount)
+            for pk, amount in wanted.items() if pk not in existing
+        ]
+        changes = {row.ingredient_id: (row.amount, 1) for row in created}
+        updated = []
+        deleted = []
+        for pk, row in existing.items():
+            if pk not in wanted:
+                deleted.append(row.id)
+            elif row.amount != wanted[pk]:
+                changes[pk] = (wanted[pk] - row.amount, 0)
+                row.amount = wanted[pk]
+                updated.append(row)
+        if created:
+            IngredientRecipe.objects.bulk_create(created)
+        if updated:
+            IngredientRecipe.objects.bulk_update(updated, ('amount',))
+        if deleted:
+            IngredientRecipe.objects.filter(id__in=deleted).delete()
+        recipe_changed(recipe.id, changes)
+        return {
+            'ingredients_created': len(created),
+            'ingredients_updated': len(updated),
+            'ingredients_deleted': len(deleted),
+        }
+
     @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients', None)
         tags = validated_data.pop('tags', None)
         instance = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            schedule_variants(instance)
+        self.touched_rows = {}
         if tags:
-            instance.tags.set(tags)
+            self.touched_rows.update(self.sync_tags(instance, tags))
         if ingredients:
-            instance.ingredients.clear()
-            ingredients_list = [
-                IngredientRecipe(
-                    recipe=instance,
-                    ingredient=ingredient.get('id'),
-                    amount=ingredient.get('amount')
-                )
-                for ingredient in ingredients
-            ]
-            IngredientRecipe.objects.bulk_create(ingredients_list)
+            self.touched_rows.update(
+                self.sync_ingredients(instance, ingredients)
+            )
         return instance
 
-    def validate(self, data):
-        ingredient_data = self.initial_data.get('ingredients')
-        if ingredient_data:
-            checked_ingredients = set()
-            for ingredient in ingredient_data:
-                ingredient_obj = get_object_or_404(
-                    Ingredient, id=ingredient['id']
-                )
-                if ingredient_obj in checked_ingredients:
-                    raise serializers.ValidationError('дубликат ингредиента')
-                checked_ingredients.add(ingredient_obj)
-        return data
-
     class Meta:
         model = Recipe
         fields = (
@@ -205,11 +278,13 @@ class FollowRecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'thumbnail',
+            'image_webp',
             'cooking_time'
         )
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(TimedModelSerializer):
     class Meta:
         model = Favorite
         fields = ('user', 'recipe')
@@ -222,6 +297,12 @@ class FavoriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Рецепт уже в избранном')
         return value
 
+    @transaction.atomic
+    def create(self, validated_data):
+        favorite = super().create(validated_data)
+        change_counter(Recipe, favorite.recipe_id, 'favorites_count', 1)
+        return favorite
+
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
@@ -229,7 +310,7 @@ class FavoriteSerializer(serializers.ModelSerializer):
                                       context=context).data
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShoppingCartSerializer(TimedModelSerializer):
     class Meta:
         model = ShoppingCart
         fields = ('user', 'recipe')
@@ -242,8 +323,39 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Рецепт уже в списке покупок')
         return value
 
+    @transaction.atomic
+    def create(self, validated_data):
+        shopping_cart = super().create(validated_data)
+        change_counter(Recipe, shopping_cart.recipe_id, 'carts_count', 1)
+        return shopping_cart
+
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
         return FollowRecipeSerializer(instance.recipe,
                                       context=context).data
+
+
+class ShoppingListItemSerializer(TimedModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount', 'recipes_count')
+        list_serializer_class = TimedListSerializer
+
+
+class CookableQuerySerializer(serializers.Serializer):
+    """Параметры подбора рецептов по имеющимся ингредиентам."""
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=constants.COOKABLE_MAX_INGREDIENTS
+    )
+    missing = serializers.IntegerField(
+        min_value=0, max_value=constants.COOKABLE_MAX_MISSING, default=0
+    )
@@ -0,0 +1,133 @@
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from recipes.models import (
+    IngredientRecipe, ShoppingCart, ShoppingListItem, User
+)
+
+BATCH_SIZE = 1000
+
+
+def apply_deltas(deltas):
+    """Применяет изменения списков покупок.
+
+    deltas: {(user, ingredient): (amount, recipes)}. Позиции, у которых
+    не осталось рецептов, удаляются, а отрицательные изменения
+    отсутствующих позиций пропускаются. Строки пользователей
+    блокируются до конца транзакции, поэтому параллельные изменения
+    списка одного пользователя выполняются по очереди.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if deltas:
+        update_items(deltas)
+
+
+@transaction.atomic
+def update_items(deltas):
+    users = {user for user, _ in deltas}
+    list(User.objects.select_for_update().filter(
+        pk__in=users
+    ).order_by('pk').values_list('pk', flat=True))
+    existing = {
+        (item.user_id, item.ingredient_id): item
+        for item in ShoppingListItem.objects.filter(
+            user__in=users,
+            ingredient__in={ingredient for _, ingredient in deltas},
+        )
+    }
+    created = []
+    updated = []
+    deleted = []
+    for (user, ingredient), (amount, recipes) in deltas.items():
+        item = existing.get((user, ingredient))
+        if item is None:
+            if amount > 0 and recipes > 0:
+                created.append(ShoppingListItem(
+                    user_id=user, ingredient_id=ingredient,
+                    amount=amount, recipes_count=recipes
+                ))
+            continue
+        item.amount = max(item.amount + amount, 0)
+        item.recipes_count += recipes
+        if item.recipes_count > 0:
+            updated.append(item)
+        else:
+            deleted.append(item.id)
+    if created:
+        ShoppingListItem.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    if updated:
+        ShoppingListItem.objects.bulk_update(
+            updated, ('amount', 'recipes_count'), batch_size=BATCH_SIZE
+        )
+    if deleted:
+        ShoppingListItem.objects.filter(id__in=deleted).delete()
+
+
+def recipe_deltas(users, changes):
+    """Изменения {ingredient: (amount, recipes)} для каждого из users."""
+    return {
+        (user, ingredient): delta
+        for user in users
+        for ingredient, delta in changes.items()
+    }
+
+
+def recipe_ingredients(recipe_id, sign=1):
+    return {
+        ingredient: (sign * amount, sign)
+        for ingredient, amount in IngredientRecipe.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', 'amount')
+    }
+
+
+def cart_added(user_id, recipe_id):
+    apply_deltas(recipe_deltas((user_id,), recipe_ingredients(recipe_id)))
+
+
+def cart_removed(user_id, recipe_id):
+    apply_deltas(
+        recipe_deltas((user_id,), recipe_ingredients(recipe_id, -1))
+    )
+
+
+def cart_users(recipe_id):
+    return ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+        'user_id', flat=True
+    )
+
+
+def recipe_changed(recipe_id, changes):
+    """Изменения состава рецепта у всех, у кого он в корзине."""
+    if changes:
+        apply_deltas(recipe_deltas(cart_users(recipe_id), changes))
+
+
+def ingredient_added(recipe_id, ingredient_id, amount):
+    recipe_changed(recipe_id, {ingredient_id: (amount, 1)})
+
+
+def ingredient_removed(recipe_id, ingredient_id, amount):
+    recipe_changed(recipe_id, {ingredient_id: (-amount, -1)})
+
+
+@transaction.atomic
+def rebuild_shopping_lists():
+    ShoppingListItem.objects.all().delete()
+    rows = IngredientRecipe.objects.filter(
+        recipe__carts__isnull=False
+    ).values('recipe__carts__user', 'ingredient').annotate(
+        total=Sum('amount'), recipes=Count('recipe')
+    ).order_by().values_list(
+        'recipe__carts__user', 'ingredient', 'total', 'recipes'
+    )
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user, ingredient_id=ingredient,
+                amount=amount, recipes_count=recipes
+            )
+            for user, ingredient, amount, recipes in rows.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+    )
@@ -0,0 +1,125 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save
+)
+from django.dispatch import receiver
+
+from recipes import feed, shopping_list
+from recipes.models import (
+    Ingredient, IngredientRecipe, Recipe, ShoppingCart, Tag, User
+)
+from recipes.versions import AUTHOR_VERSION, bump_version
+from users.models import Follow
+
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(**kwargs):
+    bump_version('ingredients')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(**kwargs):
+    bump_version('tags')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def recipe_changed(**kwargs):
+    bump_version('recipes')
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(action, **kwargs):
+    if action.startswith('post_'):
+        bump_version('recipes')
+
+
+@receiver(pre_save, sender=User)
+def user_saving(instance, update_fields=None, **kwargs):
+    """Отмечает изменение полей автора, которые видны в рецептах."""
+    fields = [
+        name for name in AUTHOR_FIELDS
+        if update_fields is None or name in update_fields
+    ]
+    instance._author_changed = bool(
+        fields and instance.pk is not None
+        and User.objects.filter(
+            pk=instance.pk, recipes__isnull=False
+        ).exclude(
+            **{name: getattr(instance, name) for name in fields}
+        ).exists()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_changed(instance, **kwargs):
+    if instance._author_changed:
+        bump_version('recipes')
+        bump_version(AUTHOR_VERSION.format(instance.pk))
+
+
+def previous_values(instance, *fields):
+    if instance.pk is None:
+        return None
+    return type(instance).objects.filter(pk=instance.pk).values_list(
+        *fields
+    ).first()
+
+
+# Списки покупок пересчитываются сигналами, чтобы их не ломали админка
+# и каскадные удаления. Пара «корзина — строка состава» вычитается
+# при удалении первой из них: вторая в этот момент ещё в базе.
+@receiver(pre_save, sender=ShoppingCart)
+def shopping_cart_saving(instance, raw=False, **kwargs):
+    instance._previous = None if raw else previous_values(
+        instance, 'user_id', 'recipe_id'
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_saved(instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.user_id, instance.recipe_id)
+    if instance._previous == current:
+        return
+    if instance._previous is not None:
+        shopping_list.cart_removed(*instance._previous)
+    shopping_list.cart_added(*current)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_deleted(instance, **kwargs):
+    shopping_list.cart_removed(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_save, sender=IngredientRecipe)
+def ingredient_recipe_saving(instance, raw=False, **kwargs):
+    instance._previous = None if raw else previous_values(
+        instance, 'recipe_id', 'ingredient_id', 'amount'
+    )
+
+
+@receiver(post_save, sender=IngredientRecipe)
+def ingredient_recipe_saved(instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.recipe_id, instance.ingredient_id, instance.amount)
+    if instance._previous == current:
+        return
+    if instance._previous is not None:
+        shopping_list.ingredient_removed(*instance._previous)
+    shopping_list.ingredient_added(*current)
+
+
+@receiver(post_delete, sender=IngredientRecipe)
+def ingredient_recipe_deleted(instance, **kwargs):
+    shopping_list.ingredient_removed(
+        instance.recipe_id, instance.ingredient_id, instance.amount
+    )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(instance, **kwargs):
+    feed.prune(instance.user_id, instance.author_id)
@@ -0,0 +1,43 @@
+from django.test import TestCase
+
+from recipes.autocomplete import IngredientIndex
+from recipes.models import Ingredient
+
+
+class IngredientIndexTest(TestCase):
+    """Поиск по подстроке совпадает с полным перебором названий."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in (
+                'Соль', 'Сахар', 'Сахарная пудра', 'Морская соль',
+                'Фасоль', 'Ванильный сахар', 'Масло', 'Подсолнечное масло',
+            )
+        )
+
+    def expected(self, query):
+        names = sorted(
+            name.lower()
+            for name in Ingredient.objects.values_list('name', flat=True)
+        )
+        return (
+            [name for name in names if name.startswith(query)]
+            + [
+                name for name in names
+                if query in name and not name.startswith(query)
+            ]
+        )
+
+    def test_search_matches_scan(self):
+        index = IngredientIndex()
+        for query in ('с', 'со', 'соль', 'сахар', 'масло', 'ль', 'xyz'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    [
+                        ingredient.name.lower()
+                        for ingredient in index.search(query)
+                    ],
+                    self.expected(query)
+                )
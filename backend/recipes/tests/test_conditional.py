@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+from users.models import User
+
+
+class RecipeConditionalTest(TestCase):
+    """ETag карточки меняется вместе с данными автора и ингредиентов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Тестов', password='pass'
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='Соль', measurement_unit='г'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/images/test.png'
+        )
+        IngredientRecipe.objects.create(
+            recipe=cls.recipe, ingredient=cls.ingredient, amount=5
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def assert_revalidation_fails_after(self, instance, **changes):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304
+        )
+        for name, value in changes.items():
+            setattr(instance, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_author_rename(self):
+        data = self.assert_revalidation_fails_after(
+            self.author, first_name='Другое'
+        )
+        self.assertEqual(data['author']['first_name'], 'Другое')
+
+    def test_ingredient_rename(self):
+        data = self.assert_revalidation_fails_after(
+            self.ingredient, name='Морская соль'
+        )
+        self.assertEqual(data['ingredients'][0]['name'], 'Морская соль')
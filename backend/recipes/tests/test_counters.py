@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from recipes.counters import change_counter, rebuild_counters
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+
+class CountersTest(TestCase):
+    """Счётчики не уходят в минус до первого пересчёта."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='pass'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/images/test.png'
+        )
+
+    def test_decrement_of_stale_counter_stops_at_zero(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=0)
+        change_counter(Recipe, self.recipe.pk, 'favorites_count', -1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_rebuild_restores_counters(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=0)
+        rebuild_counters()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.feed import schedule_fan_out
+from recipes.models import FeedItem, Recipe
+from users.models import Follow, User
+
+
+@override_settings(FEED_FAN_OUT_SYNC=True)
+@mock.patch('recipes.constants.FEED_CELEBRITY_FOLLOWERS', 2)
+class FeedTest(TestCase):
+    """Ленты подписок не расходятся с подписками и рецептами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.reader, cls.other = (
+            User.objects.create_user(
+                email=f'{name}@example.com', username=name,
+                first_name='Имя', last_name='Фамилия', password='pass'
+            )
+            for name in ('author', 'reader', 'other')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def request(self, user, method, url):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url)
+
+    def subscribe(self, user):
+        response = self.request(
+            user, 'post', f'/api/users/{self.author.id}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def publish(self):
+        recipe = Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/images/test.png'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_fan_out(recipe)
+        return recipe
+
+    def feed(self, user):
+        self.client.force_authenticate(user)
+        return [
+            recipe['id']
+            for recipe in self.client.get('/api/recipes/feed/').data[
+                'results'
+            ]
+        ]
+
+    def test_follow_deleted_outside_api(self):
+        self.subscribe(self.reader)
+        self.publish()
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertFalse(FeedItem.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed(self.reader), [])
+
+    def test_recipe_published_while_celebrity(self):
+        self.subscribe(self.reader)
+        self.subscribe(self.other)
+        recipe = self.publish()
+        self.assertEqual(self.feed(self.reader), [recipe.id])
+        response = self.request(
+            self.other, 'delete', f'/api/users/{self.author.id}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.feed(self.reader), [recipe.id])
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, RecipeScore, ScoreWatermark
+from recipes.ranking import create_score, update_scores
+from users.models import User
+
+
+class UpdateScoresTest(TestCase):
+    """Инкрементальный пересчёт не теряет и не удваивает события."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='pass'
+        )
+
+    def create_recipe(self, name):
+        recipe = Recipe.objects.create(
+            author=self.user, name=name, text='Описание',
+            cooking_time=10, image='recipes/images/test.png'
+        )
+        create_score(recipe)
+        return recipe
+
+    def scores(self):
+        return dict(RecipeScore.objects.values_list('recipe_id', 'popular'))
+
+    def test_incremental_update_matches_full(self):
+        first = self.create_recipe('Первый')
+        update_scores()
+        Favorite.objects.create(user=self.user, recipe=first)
+        self.create_recipe('Второй')
+        update_scores()
+        update_scores()
+        incremental = self.scores()
+        update_scores(full=True)
+        for recipe_id, score in self.scores().items():
+            self.assertAlmostEqual(incremental[recipe_id], score)
+        self.assertEqual(ScoreWatermark.objects.count(), 1)
+
+    def test_late_commit_is_counted_once(self):
+        recipe = self.create_recipe('Рецепт')
+        started = timezone.now()
+        update_scores()
+        favorite = Favorite.objects.create(user=self.user, recipe=recipe)
+        Favorite.objects.filter(pk=favorite.pk).update(
+            created=started - timedelta(seconds=1)
+        )
+        update_scores()
+        update_scores()
+        incremental = self.scores()
+        update_scores(full=True)
+        self.assertAlmostEqual(
+            incremental[recipe.id], self.scores()[recipe.id]
+        )
@@ -0,0 +1,98 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+SIZES = (1, 10, 100)
+CREATE_QUERIES = 17
+UPDATE_QUERIES = 19
+
+
+def image_data():
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8)).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeWriteQueriesTest(TestCase):
+    """Запись рецепта не требует запроса на каждый ингредиент."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Тестов', password='pass'
+        )
+        cls.tag = Tag.objects.create(
+            name='Завтрак', slug='breakfast', color='#FFFFFF'
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {index}', measurement_unit='г')
+            for index in range(max(SIZES))
+        )
+        cls.ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def payload(self, size):
+        return {
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': image_data(),
+            'tags': [self.tag.id],
+            'ingredients': [
+                {'id': pk, 'amount': 1}
+                for pk in self.ingredient_ids[:size]
+            ],
+        }
+
+    def assert_queries(self, number, method, url, data):
+        cache.clear()
+        with self.assertNumQueries(number):
+            response = method(url, data, format='json')
+        self.assertLess(response.status_code, 300, response.data)
+        self.assertEqual(
+            len(response.data['ingredients']), len(data['ingredients'])
+        )
+
+    def test_create_queries_do_not_grow(self):
+        for size in SIZES:
+            with self.subTest(ingredients=size):
+                self.assert_queries(
+                    CREATE_QUERIES, self.client.post, '/api/recipes/',
+                    self.payload(size)
+                )
+
+    def test_update_queries_do_not_grow(self):
+        for size in SIZES:
+            recipe = Recipe.objects.create(
+                author=self.user, name='Рецепт', text='Описание',
+                cooking_time=10, image='recipes/images/test.png'
+            )
+            with self.subTest(ingredients=size):
+                self.assert_queries(
+                    UPDATE_QUERIES, self.client.patch,
+                    f'/api/recipes/{recipe.id}/', self.payload(size)
+                )
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes import relations
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+
+class RelationsCacheTest(TestCase):
+    """Загрузка, пересёкшаяся с записью, не оставляет устаревший кэш."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='pass'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/images/test.png'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_relations(self):
+        return relations.get_relations(SimpleNamespace(user=self.user))
+
+    def test_write_committed_during_load(self):
+        load = relations.load_relations
+
+        def load_then_write(user_id):
+            loaded = load(user_id)
+            with self.captureOnCommitCallbacks(execute=True):
+                Favorite.objects.create(user=self.user, recipe=self.recipe)
+                relations.invalidate_relations(self.user.id)
+            return loaded
+
+        with mock.patch.object(
+            relations, 'load_relations', load_then_write
+        ):
+            self.assertEqual(self.get_relations().favorites, frozenset())
+        self.assertEqual(
+            self.get_relations().favorites, frozenset((self.recipe.id,))
+        )
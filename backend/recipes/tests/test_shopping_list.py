@@ -0,0 +1,140 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Ingredient, IngredientRecipe, Recipe, ShoppingCart, ShoppingListItem
+)
+from recipes.shopping_list import rebuild_shopping_lists
+from users.models import User
+
+
+class ShoppingListTest(TestCase):
+    """Хранимый список покупок совпадает с пересчитанным с нуля."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='buyer@example.com', username='buyer',
+            first_name='Покупатель', last_name='Тестов', password='pass'
+        )
+        cls.salt, cls.sugar, cls.flour = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('Соль', 'Сахар', 'Мука')
+        )
+        cls.first = cls.create_recipe({cls.salt: 5, cls.sugar: 100})
+        cls.second = cls.create_recipe({cls.sugar: 50})
+
+    @classmethod
+    def create_recipe(cls, ingredients):
+        recipe = Recipe.objects.create(
+            author=cls.user, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/images/test.png'
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            for ingredient, amount in ingredients.items()
+        )
+        return recipe
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def shopping_list(self):
+        return set(ShoppingListItem.objects.values_list(
+            'user', 'ingredient', 'amount', 'recipes_count'
+        ))
+
+    def assert_matches_rebuild(self, expected):
+        stored = self.shopping_list()
+        rebuild_shopping_lists()
+        self.assertEqual(stored, self.shopping_list())
+        self.assertEqual(stored, {
+            (self.user.id, ingredient.id, amount, recipes)
+            for ingredient, (amount, recipes) in expected.items()
+        })
+
+    def add(self, recipe):
+        response = self.client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+        self.assertEqual(response.status_code, 201)
+
+    def test_add(self):
+        self.add(self.first)
+        self.add(self.second)
+        self.assert_matches_rebuild({
+            self.salt: (5, 1), self.sugar: (150, 2)
+        })
+
+    def test_remove(self):
+        self.add(self.first)
+        self.add(self.second)
+        response = self.client.delete(
+            f'/api/recipes/{self.first.id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assert_matches_rebuild({self.sugar: (50, 1)})
+
+    def test_ingredient_diff(self):
+        self.add(self.first)
+        self.add(self.second)
+        response = self.client.patch(
+            f'/api/recipes/{self.first.id}/',
+            {'ingredients': [
+                {'id': self.sugar.id, 'amount': 30},
+                {'id': self.flour.id, 'amount': 200},
+            ]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_matches_rebuild({
+            self.sugar: (80, 2), self.flour: (200, 1)
+        })
+
+    def test_missing_item_is_not_created_negative(self):
+        self.add(self.first)
+        ShoppingListItem.objects.all().delete()
+        response = self.client.delete(
+            f'/api/recipes/{self.first.id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+    def test_recipe_deleted_outside_api(self):
+        self.add(self.first)
+        self.add(self.second)
+        self.first.delete()
+        self.assert_matches_rebuild({self.sugar: (50, 1)})
+
+    def test_author_deleted(self):
+        author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Тестов', password='pass'
+        )
+        Recipe.objects.filter(pk=self.first.pk).update(author=author)
+        self.add(self.first)
+        self.add(self.second)
+        author.delete()
+        self.assert_matches_rebuild({self.sugar: (50, 1)})
+
+    def test_cart_deleted_outside_api(self):
+        self.add(self.first)
+        ShoppingCart.objects.filter(recipe=self.first).delete()
+        self.assert_matches_rebuild({})
+
+    def test_ingredient_row_edited_outside_api(self):
+        self.add(self.first)
+        row = IngredientRecipe.objects.get(
+            recipe=self.first, ingredient=self.salt
+        )
+        row.amount = 7
+        row.save()
+        row = IngredientRecipe.objects.get(
+            recipe=self.first, ingredient=self.sugar
+        )
+        row.ingredient = self.flour
+        row.save()
+        self.assert_matches_rebuild({
+            self.salt: (7, 1), self.flour: (100, 1)
+        })
@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from recipes.models import Recipe
+from recipes.versions import get_version
+from users.models import User
+
+
+class UserChangedTest(TestCase):
+    """Версия рецептов меняется только при правке видимых полей автора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Тестов', password='pass'
+        )
+        cls.reader = User.objects.create_user(
+            email='reader@example.com', username='reader',
+            first_name='Читатель', last_name='Тестов', password='pass'
+        )
+        Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/images/test.png'
+        )
+
+    def assert_bumps(self, user, expected, **changes):
+        for name, value in changes.items():
+            setattr(user, name, value)
+        version = get_version('recipes')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(get_version('recipes') != version, expected)
+
+    def test_author_visible_fields(self):
+        self.assert_bumps(self.author, True, first_name='Другое')
+        self.assert_bumps(self.author, True, email='new@example.com')
+
+    def test_other_changes(self):
+        self.assert_bumps(self.author, False)
+        self.assert_bumps(self.author, False, password='hash')
+        self.assert_bumps(self.reader, False, first_name='Другое')
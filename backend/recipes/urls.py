@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
+from recipes import async_views
 from recipes.views import IngredientViewSet, RecipeViewSet, TagViewSet
 
 app_name = 'recipes'
@@ -10,3 +12,16 @@ router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [path('', include(router.urls))]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = [
+        path('tags/', async_views.TagListView.as_view()),
+        path('tags/<int:pk>/', async_views.TagDetailView.as_view()),
+        path('ingredients/', async_views.IngredientListView.as_view()),
+        path(
+            'ingredients/<int:pk>/',
+            async_views.IngredientDetailView.as_view()
+        ),
+        path('recipes/', async_views.RecipeListView.as_view()),
+        path('recipes/<int:pk>/', async_views.RecipeDetailView.as_view()),
+    ] + urlpatterns
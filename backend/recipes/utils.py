@@ -1,7 +1,10 @@
+import csv
+import hashlib
 import io
 import os
 
-from django.http import FileResponse
+from django.core.cache import cache
+from django.http import FileResponse, StreamingHttpResponse
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle
@@ -10,6 +13,7 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
 
 FONTS_ROOT = os.path.dirname(os.path.abspath(__file__))
+FONT_NAME = 'arial'
 HEADER_FONT_SIZE = 28
 HEADER_TOP_MARGIN = 20
 HEADER_BOTTOM_MARGIN = 35
@@ -21,33 +25,53 @@ TEXT_RIGHT_MARGIN = 12
 TEXT_LEFT_MARGIN = 50
 SPACER = 1
 STREAM_POSITION = 0
+SHOPPING_LIST_TITLE = 'Список покупок'
+SHOPPING_LIST_FILENAME = 'shopping_list'
+SHOPPING_LIST_CACHE_KEY = 'shopping_list_pdf:{}'
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
 
+pdfmetrics.registerFont(
+    TTFont(FONT_NAME, os.path.join(FONTS_ROOT, 'fonts/', 'arial.ttf'))
+)
+HEADER_STYLE = ParagraphStyle(
+    name='name', fontName=FONT_NAME, fontSize=HEADER_FONT_SIZE,
+    alignment=TA_CENTER
+)
+BODY_STYLE = ParagraphStyle(
+    name='line', fontName=FONT_NAME, fontSize=BODY_FONT_SIZE,
+    alignment=TA_LEFT
+)
 
-def header(doc, title, size, space, ta):
+
+class Echo:
+    """Псевдобуфер для csv.writer, возвращающий строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def format_line(name, amount, measurement_unit):
+    return f'{name} - {amount} {measurement_unit}'
+
+
+def header(doc, title, style, space):
     doc.append(Spacer(SPACER, HEADER_TOP_MARGIN))
-    doc.append(Paragraph(title, ParagraphStyle(
-        name='name', fontName='arial', fontSize=size, alignment=ta
-    )))
+    doc.append(Paragraph(title, style))
     doc.append(Spacer(SPACER, space))
     return doc
 
 
-def body(doc, text, size):
+def body(doc, text, style):
     for line in text:
-        doc.append(Paragraph(line, ParagraphStyle(
-            name='line', fontName='arial', fontSize=size, alignment=TA_LEFT
-        )))
+        doc.append(Paragraph(line, style))
         doc.append(Spacer(SPACER, BODY_LINE_SPACING))
     return doc
 
 
-def download_pdf(data):
+def render_pdf(ingredients):
     buffer = io.BytesIO()
-    font_path = os.path.join(FONTS_ROOT, 'fonts/', 'arial.ttf')
-    pdfmetrics.registerFont(TTFont('arial', font_path))
-    doc = header(
-        [], 'Список покупок', HEADER_FONT_SIZE, HEADER_BOTTOM_MARGIN, TA_CENTER
-    )
+    doc = header([], SHOPPING_LIST_TITLE, HEADER_STYLE, HEADER_BOTTOM_MARGIN)
     pdf = SimpleDocTemplate(
         buffer,
         pagesize=A4,
@@ -56,8 +80,54 @@ def download_pdf(data):
         rightMargin=TEXT_RIGHT_MARGIN,
         leftMargin=TEXT_LEFT_MARGIN,
     )
-    pdf.build(body(doc, data, BODY_FONT_SIZE))
-    buffer.seek(STREAM_POSITION)
+    lines = [format_line(*ingredient) for ingredient in ingredients]
+    pdf.build(body(doc, lines, BODY_STYLE))
+    return buffer.getvalue()
+
+
+def download_pdf(ingredients):
+    """PDF со списком покупок; одинаковые списки рендерятся один раз."""
+    ingredients = list(ingredients)
+    digest = hashlib.sha256(repr(ingredients).encode()).hexdigest()
+    key = SHOPPING_LIST_CACHE_KEY.format(digest)
+    content = cache.get(key)
+    if content is None:
+        content = render_pdf(ingredients)
+        cache.set(key, content, SHOPPING_LIST_CACHE_TIMEOUT)
     return FileResponse(
-        buffer, as_attachment=True, filename='shopping_list.pdf'
+        io.BytesIO(content), as_attachment=True,
+        filename=f'{SHOPPING_LIST_FILENAME}.pdf'
     )
+
+
+def stream_response(lines, content_type, extension):
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{SHOPPING_LIST_FILENAME}.{extension}"'
+    )
+    return response
+
+
+def download_txt(ingredients):
+    def lines():
+        yield f'{SHOPPING_LIST_TITLE}:\n'
+        for ingredient in ingredients:
+            yield format_line(*ingredient) + '\n'
+    return stream_response(lines(), 'text/plain; charset=utf-8', 'txt')
+
+
+def download_csv(ingredients):
+    writer = csv.writer(Echo())
+
+    def rows():
+        yield writer.writerow(CSV_HEADER)
+        for ingredient in ingredients:
+            yield writer.writerow(ingredient)
+    return stream_response(rows(), 'text/csv; charset=utf-8', 'csv')
+
+
+SHOPPING_LIST_DOWNLOADS = {
+    'pdf': download_pdf,
+    'txt': download_txt,
+    'csv': download_csv,
+}
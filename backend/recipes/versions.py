@@ -0,0 +1,48 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes import constants
+from recipes.checks import is_process_local
+
+VERSION_CACHE_KEY = 'version:{}'
+AUTHOR_VERSION = 'author:{}'
+
+
+def version_timeout():
+    """Время жизни версии в кэше.
+
+    В общем кэше версии не истекают. В памяти процесса (один воркер)
+    истекают через LOCAL_VERSION_TIMEOUT: новая версия лишь сбрасывает
+    производные кэши, зато расхождение не живёт дольше этого срока.
+    """
+    if is_process_local('default'):
+        return constants.LOCAL_VERSION_TIMEOUT
+    return None
+
+
+def get_version(name):
+    """Версия набора данных: метка времени его последнего изменения.
+
+    Если версии нет в кэше, ею становится текущее время, поэтому после
+    очистки кэша или истечения версии они только растут.
+    """
+    key = VERSION_CACHE_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), version_timeout())
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    key = VERSION_CACHE_KEY.format(name)
+    transaction.on_commit(
+        lambda: cache.set(key, time.time(), version_timeout())
+    )
+
+
+def version_datetime(version):
+    return datetime.fromtimestamp(version, tz=timezone.utc)
@@ -1,34 +1,71 @@
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from recipes.filters import IngredientFilter, Recipe, RecipeFilter
+from rest_framework.utils.urls import replace_query_param
+from recipes import constants
+from recipes.conditional import recipe_conditional, table_conditional
+from recipes.cookable import recipe_ingredient_index
+from recipes.counters import change_counter
+from recipes.db import read_from_replica
+from recipes.feed import decode_cursor, get_feed
+from recipes.autocomplete import ingredient_index
+from recipes.filters import Recipe, RecipeFilter, RecipeOrderingFilter
 from recipes.models import (
-    Favorite, Ingredient, IngredientRecipe, ShoppingCart, Tag
+    Favorite, Ingredient, IngredientRecipe, ShoppingCart, ShoppingListItem,
+    Tag, User
 )
+from recipes.paginations import (
+    CustomPageNumberPagination, RecipePagination
+)
+from recipes.parsers import RecipeJSONParser, RecipeMultiPartParser
 from recipes.permissions import IsAuthenticatedOwnerOrReadOnly
 from recipes.serializers import (
+    CookableQuerySerializer,
     FavoriteSerializer,
     IngredientSerializer,
     RecipeSerializer,
     ShoppingCartSerializer,
+    ShoppingListItemSerializer,
     TagSerializer
 )
-from recipes.utils import download_pdf
+from recipes.relations import invalidate_relations
+from recipes.response_cache import anonymous_response_cache
+from recipes.utils import SHOPPING_LIST_DOWNLOADS
+
+RECIPE_LIST_CACHE_VERSIONS = ('recipes', 'tags', 'ingredients')
 
 
+@method_decorator(read_from_replica(), name='retrieve')
+@method_decorator(read_from_replica(), name='list')
+@method_decorator(table_conditional('ingredients'), name='retrieve')
+@method_decorator(table_conditional('ingredients'), name='list')
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     pagination_class = None
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny,)
-    filter_backends = (IngredientFilter,)
-    search_fields = ('^name',)
+    search_param = 'name'
+
+    def search(self, request):
+        return ingredient_index.search(
+            request.query_params.get(self.search_param, '')
+        )
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.search(request), many=True)
+        return Response(serializer.data)
 
 
+@method_decorator(read_from_replica(), name='retrieve')
+@method_decorator(read_from_replica(), name='list')
+@method_decorator(table_conditional('tags'), name='retrieve')
+@method_decorator(table_conditional('tags'), name='list')
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     pagination_class = None
@@ -36,15 +73,57 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TagSerializer
 
 
+@method_decorator(recipe_conditional, name='retrieve')
+@method_decorator(read_from_replica(anonymous_only=True), name='list')
+@method_decorator(
+    anonymous_response_cache(*RECIPE_LIST_CACHE_VERSIONS), name='list'
+)
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (IsAuthenticatedOwnerOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = RecipePagination
+    parser_classes = (RecipeJSONParser, RecipeMultiPartParser)
+    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
     filterset_class = RecipeFilter
+    feed_cursor_param = 'cursor'
+
+    def get_queryset(self):
+        return Recipe.objects.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_to_recipe',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            )
+        )
+
+    def reload_instance(self, serializer):
+        """Рецепт для ответа с prefetch, без запроса на ингредиент."""
+        serializer.instance = self.get_queryset().get(
+            pk=serializer.instance.pk
+        )
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        self.reload_instance(serializer)
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        touched_rows = getattr(self, 'touched_rows', {})
+        response[constants.TOUCHED_ROWS_HEADER] = ', '.join(
+            f'{name}={count}' for name, count in touched_rows.items()
+        )
+        return response
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self.touched_rows = serializer.touched_rows
+        self.reload_instance(serializer)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        change_counter(User, instance.author_id, 'recipes_count', -1)
 
     @action(detail=True, methods=('post', ),
             permission_classes=[IsAuthenticated])
@@ -55,6 +134,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                                         context={'request': request})
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_relations(user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @favorite.mapping.delete
@@ -62,7 +142,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
         user = self.request.user
         recipe = get_object_or_404(Recipe, pk=pk)
         favorite = get_object_or_404(Favorite, user=user, recipe=recipe)
-        favorite.delete()
+        with transaction.atomic():
+            favorite.delete()
+            change_counter(Recipe, recipe.id, 'favorites_count', -1)
+        invalidate_relations(user.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=('post', ),
@@ -74,6 +157,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                                             context={'request': request})
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_relations(user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @shopping_cart.mapping.delete
@@ -82,28 +166,94 @@ class RecipeViewSet(viewsets.ModelViewSet):
         recipe = get_object_or_404(Recipe, pk=pk)
         shopping_cart = get_object_or_404(ShoppingCart,
                                           user=user, recipe=recipe)
-        shopping_cart.delete()
+        with transaction.atomic():
+            shopping_cart.delete()
+            change_counter(Recipe, recipe.id, 'carts_count', -1)
+        invalidate_relations(user.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        methods=('GET',),
+        detail=False,
+        pagination_class=CustomPageNumberPagination
+    )
+    def cookable(self, request):
+        """Рецепты из имеющихся ингредиентов: ?ingredients=1&missing=2."""
+        query = CookableQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        found = self.paginate_queryset(recipe_ingredient_index.search(
+            query.validated_data['ingredients'],
+            query.validated_data['missing']
+        ))
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _ in found]
+        )
+        found = [
+            (recipes[recipe_id], missing)
+            for recipe_id, missing in found if recipe_id in recipes
+        ]
+        data = self.get_serializer(
+            [recipe for recipe, _ in found], many=True
+        ).data
+        for item, (_, missing) in zip(data, found):
+            item['missing_ingredients'] = missing
+        return self.get_paginated_response(data)
+
+    @action(
+        methods=('GET',),
+        detail=False,
+        permission_classes=(IsAuthenticated,)
+    )
+    def feed(self, request):
+        """Новые рецепты авторов из подписок, страницы по ?cursor=."""
+        cursor = request.query_params.get(self.feed_cursor_param)
+        recipe_ids, next_cursor = get_feed(
+            request.user,
+            decode_cursor(cursor) if cursor else None,
+            CustomPageNumberPagination().get_page_size(request)
+        )
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes], many=True
+        )
+        next_url = None
+        if next_cursor:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), self.feed_cursor_param,
+                next_cursor
+            )
+        return Response({'next': next_url, 'results': serializer.data})
+
     @action(
         methods=('GET',),
         detail=False,
         permission_classes=(IsAuthenticated,)
     )
     def download_shopping_cart(self, request):
-        user = self.request.user
-        shopping_cart = ShoppingCart.objects.filter(user=user)
-        list = ['Список покупок:\n']
-        id = []
-        for recipe in shopping_cart:
-            id.append(recipe.recipe.id)
-        ingredients = IngredientRecipe.objects.filter(
-            recipe__in=id).values(
-            'ingredient__name', 'ingredient__measurement_unit').annotate(
-                ingredient__amount=Sum('amount'))
-        for ingredient in ingredients:
-            name = ingredient['ingredient__name']
-            amount = ingredient['ingredient__amount']
-            measurement_unit = ingredient['ingredient__measurement_unit']
-            list.append(f'{name} - {amount} {measurement_unit}\n')
-        return download_pdf(list)
+        file_type = request.query_params.get('type', 'pdf')
+        if file_type not in SHOPPING_LIST_DOWNLOADS:
+            return Response(
+                {'type': f'Доступные форматы: '
+                         f'{", ".join(SHOPPING_LIST_DOWNLOADS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ingredients = self.get_shopping_list(request).values_list(
+            'ingredient__name', 'amount', 'ingredient__measurement_unit'
+        )
+        return SHOPPING_LIST_DOWNLOADS[file_type](ingredients.iterator())
+
+    def get_shopping_list(self, request):
+        return ShoppingListItem.objects.filter(
+            user=request.user
+        ).select_related('ingredient').order_by('ingredient__name')
+
+    @action(
+        methods=('GET',),
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        pagination_class=CustomPageNumberPagination
+    )
+    def shopping_list(self, request):
+        page = self.paginate_queryset(self.get_shopping_list(request))
+        serializer = ShoppingListItemSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,21 @@
+from recipes.async_views import AsyncReadView, in_thread
+from recipes.relations import get_relations
+from users.views import SubscriptionsView
+
+
+class SubscriptionsListView(AsyncReadView):
+    view_class = SubscriptionsView
+
+    async def get(self, view, request, **kwargs):
+        pagination = self.get_page_pagination(view, request)
+        if pagination is not None:
+            queryset = await in_thread(
+                lambda: view.filter_queryset(view.get_queryset())
+            )()
+            response = await self.paginate(
+                view, request, pagination, queryset,
+                lambda: get_relations(request)
+            )
+            if response is not None:
+                return response
+        return await in_thread(view.list)(request)
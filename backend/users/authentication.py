@@ -0,0 +1,181 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from recipes.metrics import extra_counters
+from recipes.versions import bump_version, get_version
+from users import constants
+from users.models import User
+
+TOKEN_CACHE_KEY = 'token:{}'
+TOKEN_CACHE_VERSION = 'tokens:{}'
+# Пароль и счётчики не кэшируются: при обращении они догружаются из БД,
+# а save() закэшированного пользователя их не перезаписывает.
+CACHED_USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.editable and field.attname != 'password'
+)
+# Изменение этих полей или токенов пользователя сбрасывает его записи.
+TOKEN_USER_FIELDS = tuple(
+    name for name in CACHED_USER_FIELDS if name != 'last_login'
+) + ('password',)
+token_cache_metrics = Counter()
+extra_counters['token_cache'] = token_cache_metrics
+
+
+class TokenCache:
+    """LRU «ключ токена → данные пользователя» в памяти процесса.
+
+    Записи живут timeout секунд. Актуальность записи по версии
+    токенов пользователя проверяет CachedTokenAuthentication.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+token_cache = TokenCache(
+    constants.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TIMEOUT
+)
+
+
+def shared_cache_key(key):
+    return TOKEN_CACHE_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def token_version(user_id):
+    return get_version(TOKEN_CACHE_VERSION.format(user_id))
+
+
+def bump_token_version(user_id):
+    bump_version(TOKEN_CACHE_VERSION.format(user_id))
+
+
+def pack(token, version):
+    return (
+        token.user_id,
+        version,
+        tuple(getattr(token.user, name) for name in CACHED_USER_FIELDS),
+        token.created,
+    )
+
+
+def is_current(value):
+    user_id, version, _, _ = value
+    return version == token_version(user_id)
+
+
+def unpack(key, value):
+    _, _, values, created = value
+    user = User.from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, values)
+    return user, Token(key=key, user=user, created=created)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к БД для недавно виденных токенов.
+
+    Сначала проверяется LRU процесса, затем, если задан
+    TOKEN_CACHE_ALIAS, общий кэш. Запись годна, пока не сменилась
+    версия токенов её пользователя. Неактивные пользователи и неверные
+    токены не кэшируются.
+    """
+
+    def authenticate_credentials(self, key):
+        value = token_cache.get(key)
+        if value is not None:
+            if is_current(value):
+                token_cache_metrics['local_hits'] += 1
+                return unpack(key, value)
+            token_cache.delete(key)
+        shared = (
+            caches[settings.TOKEN_CACHE_ALIAS]
+            if settings.TOKEN_CACHE_ALIAS else None
+        )
+        if shared is not None:
+            value = shared.get(shared_cache_key(key))
+            if value is not None and is_current(value):
+                token_cache_metrics['shared_hits'] += 1
+                token_cache.set(key, value)
+                return unpack(key, value)
+        token_cache_metrics['misses'] += 1
+        # Версия читается до пользователя: если его изменят между
+        # запросами, запись сразу окажется устаревшей.
+        user_id = Token.objects.filter(key=key).values_list(
+            'user_id', flat=True
+        ).first()
+        version = token_version(user_id) if user_id is not None else None
+        user, token = super().authenticate_credentials(key)
+        if token.user_id != user_id:
+            return user, token
+        value = pack(token, version)
+        token_cache.set(key, value)
+        if shared is not None:
+            shared.set(
+                shared_cache_key(key), value, settings.TOKEN_CACHE_TIMEOUT
+            )
+        return user, token
+
+
+@receiver((post_save, post_delete), sender=Token)
+def token_changed(instance, **kwargs):
+    bump_token_version(instance.user_id)
+
+
+@receiver(pre_save, sender=User)
+def user_saving(instance, update_fields=None, **kwargs):
+    """Отмечает изменение пароля или закэшированных полей пользователя.
+
+    Иначе save() устаревшей копии из кэша вернул бы в БД старые
+    значения, например снятые права администратора.
+    """
+    fields = [
+        name for name in TOKEN_USER_FIELDS
+        if update_fields is None or name in update_fields
+    ]
+    instance._tokens_changed = bool(
+        fields and instance.pk is not None
+        and User.objects.filter(pk=instance.pk).exclude(
+            **{name: getattr(instance, name) for name in fields}
+        ).exists()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_changed(instance, **kwargs):
+    if instance._tokens_changed:
+        bump_token_version(instance.pk)
@@ -2,3 +2,4 @@ MAX_LENGTH_USERNAME = 150
 MAX_EMAIL_LENGTH = 254
 MAX_FIRST_NAME_LENGTH = 150
 MAX_LAST_NAME_LENGTH = 150
+TOKEN_CACHE_SIZE = 10000
@@ -35,6 +35,10 @@ class User(AbstractUser):
         verbose_name='фамилия', max_length=constants.MAX_LAST_NAME_LENGTH)
     is_superuser = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='количество рецептов', default=0, editable=False)
+    followers_count = models.PositiveIntegerField(
+        verbose_name='количество подписчиков', default=0, editable=False)
 
     def save(self, *args, **kwargs):
         if self.username == 'me':
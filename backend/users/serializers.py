@@ -1,25 +1,20 @@
 import django.contrib.auth.password_validation as validators
 from django.core import exceptions
+from recipes.metrics import TimedListSerializer, TimedModelSerializer
+from recipes.relations import get_relations
 from recipes.serializers import FollowRecipeSerializer
 from rest_framework import serializers
 from rest_framework.fields import CurrentUserDefault
-from rest_framework.generics import get_object_or_404
 from rest_framework.validators import UniqueTogetherValidator
 from users.models import Follow, User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     def get_is_subscribed(self, obj):
-        if (
-            'request' not in self.context
-            or self.context['request'].user.is_anonymous
-        ):
-            return False
-        return Follow.objects.filter(
-            author=obj, user=self.context['request'].user
-        ).exists()
+        relations = get_relations(self.context.get('request'))
+        return obj.pk in relations.following
 
     def validate(self, data):
         user = User(**data)
@@ -49,33 +44,27 @@ class UserSerializer(serializers.ModelSerializer):
             'is_subscribed'
         )
         extra_kwargs = {'password': {'write_only': True}}
+        list_serializer_class = TimedListSerializer
 
 
-class FollowListSerializer(serializers.ModelSerializer):
+class FollowListSerializer(TimedModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source='recipes.count', read_only=True
-    )
+    recipes_count = serializers.IntegerField(read_only=True)
 
     def get_is_subscribed(self, obj):
-        if self.context['request'].user.is_anonymous:
-            return False
-        return Follow.objects.filter(
-            author=obj, user=self.context['request'].user
-        ).exists()
+        relations = get_relations(self.context.get('request'))
+        return obj.pk in relations.following
 
     def get_recipes(self, obj):
-        request = self.context['request']
-        limit = request.GET.get('recipes_limit')
-        author = get_object_or_404(User, id=obj.pk)
-        recipes = author.recipes.all()
-        if limit:
-            recipes = recipes[:int(limit)]
+        recipes = obj.recipes.all()
+        limit = self.context.get('recipes_limit')
+        if limit is not None:
+            recipes = recipes[:limit]
         serializer = FollowRecipeSerializer(
             recipes,
             many=True,
-            context={'request': request}
+            context={'request': self.context['request']}
         )
         return serializer.data
 
@@ -91,6 +80,7 @@ class FollowListSerializer(serializers.ModelSerializer):
             'recipes',
             'recipes_count'
         )
+        list_serializer_class = TimedListSerializer
 
 
 class FollowCreateSerializer(serializers.ModelSerializer):
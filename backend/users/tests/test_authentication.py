@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.authentication import CachedTokenAuthentication
+from users.models import User
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """Кэш токенов сбрасывают изменения пользователя и его токенов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='pass'
+        )
+        cls.other = User.objects.create_user(
+            email='other@example.com', username='other',
+            first_name='Другой', last_name='Фамилия', password='pass'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authentication = CachedTokenAuthentication()
+        self.token = Token.objects.create(user=self.user)
+        self.other_token = Token.objects.create(user=self.other)
+
+    def authenticate(self, token):
+        return self.authentication.authenticate_credentials(token.key)
+
+    def save(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+    def assert_cached(self, token):
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(token)
+        self.assertEqual(user.pk, token.user_id)
+
+    def test_repeated_requests_are_cached(self):
+        self.authenticate(self.token)
+        self.assert_cached(self.token)
+
+    def test_last_login_keeps_cache(self):
+        self.authenticate(self.token)
+        self.user.last_login = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=('last_login',))
+        self.assert_cached(self.token)
+
+    def test_profile_change_is_seen_on_next_request(self):
+        self.authenticate(self.token)
+        self.user.first_name = 'Другое'
+        self.user.email = 'new@example.com'
+        self.user.is_staff = True
+        self.save(self.user)
+        user, _ = self.authenticate(self.token)
+        self.assertEqual(user.first_name, 'Другое')
+        self.assertEqual(user.email, 'new@example.com')
+        self.assertTrue(user.is_staff)
+
+    def test_cached_user_save_does_not_restore_old_fields(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.authenticate(self.token)
+        demoted = User.objects.get(pk=self.user.pk)
+        demoted.is_staff = False
+        self.save(demoted)
+        user, _ = self.authenticate(self.token)
+        user.set_password('new-pass')
+        self.save(user)
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_staff)
+
+    def test_password_change_resets_only_its_user(self):
+        self.authenticate(self.token)
+        self.authenticate(self.other_token)
+        self.user.set_password('new-pass')
+        self.save(self.user)
+        self.assert_cached(self.other_token)
+        with self.assertNumQueries(2):
+            self.authenticate(self.token)
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate(self.token)
+        self.user.is_active = False
+        self.save(self.user)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token)
+
+    def test_deleted_token_is_rejected(self):
+        self.authenticate(self.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token)
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
+from users.async_views import SubscriptionsListView
 from users.views import SubscriptionsView, SubscriptionsViewSet
 
 app_name = 'users'
@@ -9,7 +11,9 @@ router.register('users', SubscriptionsViewSet, basename='user')
 
 urlpatterns = [
     path(
-        'users/subscriptions/', SubscriptionsView.as_view(),
+        'users/subscriptions/',
+        SubscriptionsListView.as_view() if settings.ASYNC_READ_VIEWS
+        else SubscriptionsView.as_view(),
         name='subscriptions'
     ),
     path('', include('djoser.urls')),
@@ -1,7 +1,16 @@
+import django
+from django.db import transaction
+from django.db.models import F, OuterRef, Prefetch, Subquery, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from recipes.counters import change_counter
+from recipes.feed import author_unfollowed, schedule_backfill
+from recipes.models import Recipe
+from recipes.paginations import SubscriptionsPagination
+from recipes.relations import invalidate_relations
 from users.models import Follow, User
 from users.serializers import FollowCreateSerializer, FollowListSerializer
 
@@ -10,10 +19,42 @@ class SubscriptionsView(generics.ListAPIView):
     queryset = User.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = FollowListSerializer
+    pagination_class = SubscriptionsPagination
+
+    def get_recipes_limit(self):
+        limit = self.request.query_params.get('recipes_limit', '')
+        return int(limit) if limit.isdigit() else None
+
+    def limit_recipes(self, recipes, limit):
+        """Не больше limit последних рецептов каждого автора.
+
+        Фильтр по оконной функции доступен с Django 4.2, до этого
+        используется коррелированный подзапрос.
+        """
+        if django.VERSION >= (4, 2):
+            return recipes.annotate(row_number=Window(
+                RowNumber(), partition_by=F('author'),
+                order_by=(F('pub_date').desc(), F('id').desc())
+            )).filter(row_number__lte=limit)
+        return recipes.filter(pk__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')
+            ).order_by('-pub_date', '-id').values('pk')[:limit]
+        ))
 
     def get_queryset(self):
-        user = self.request.user
-        return User.objects.filter(following__user=user)
+        recipes = Recipe.objects.order_by('-pub_date', '-id')
+        limit = self.get_recipes_limit()
+        if limit is not None:
+            recipes = self.limit_recipes(recipes, limit)
+        return User.objects.filter(
+            following__user=self.request.user
+        ).prefetch_related(Prefetch('recipes', queryset=recipes))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['recipes_limit'] = self.get_recipes_limit()
+        return context
 
 
 class SubscriptionsViewSet(viewsets.ModelViewSet):
@@ -32,7 +73,11 @@ class SubscriptionsViewSet(viewsets.ModelViewSet):
             data=data, context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
-        follow = Follow.objects.create(user=user, author=author)
+        with transaction.atomic():
+            follow = Follow.objects.create(user=user, author=author)
+            change_counter(User, author.id, 'followers_count', 1)
+            schedule_backfill(user.id, author.id)
+        invalidate_relations(user.id)
         serializer = FollowCreateSerializer(
             follow, context={'request': request}
         )
@@ -45,7 +90,11 @@ class SubscriptionsViewSet(viewsets.ModelViewSet):
         author = get_object_or_404(User, id=id)
         follow = Follow.objects.filter(user=user, author=author)
         if follow.exists():
-            follow.delete()
+            with transaction.atomic():
+                follow.delete()
+                change_counter(User, author.id, 'followers_count', -1)
+                author_unfollowed(author.id)
+            invalidate_relations(user.id)
             return Response(
                 {'detail': 'Вы отписались от автора'},
                 status=status.HTTP_204_NO_CONTENT